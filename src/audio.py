@@ -0,0 +1,109 @@
+import os
+from array import array
+from enum import Enum, auto
+from typing import Optional
+
+import pygame
+
+from config import SOUND_PATH, AUDIO_FREQUENCY, AUDIO_BUFFER_SIZE, AUDIO_COALESCE_WINDOW, AUDIO_SILENCE_THRESHOLD
+
+
+class SoundEvents(Enum):
+    EAT = auto()
+    GAME_OVER = auto()
+
+
+SOUND_FILES = {
+    SoundEvents.EAT: 'eat_apple.wav',
+    SoundEvents.GAME_OVER: 'game_over.wav'
+}
+
+CHANNEL_POOLS = {
+    SoundEvents.EAT: 3,
+    SoundEvents.GAME_OVER: 1
+}
+
+
+class AudioManager:
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @staticmethod
+    def pre_init() -> None:
+        pygame.mixer.pre_init(frequency=AUDIO_FREQUENCY, size=-16, channels=2, buffer=AUDIO_BUFFER_SIZE)
+
+    def __init__(self):
+        self._sound_cache: dict[str, pygame.mixer.Sound] = {}
+        self._sounds: dict[SoundEvents, pygame.mixer.Sound] = {}
+        self._channels: dict[SoundEvents, list[pygame.mixer.Channel]] = {}
+        self._next_channel: dict[SoundEvents, int] = {}
+        self._last_played: dict[SoundEvents, int] = {}
+        self.buffer_latency: float = 0.0
+        self.coalesced: int = 0
+
+    def load(self) -> None:
+        mixer_settings = pygame.mixer.get_init()
+        if mixer_settings is None:
+            return
+
+        frequency, _, _ = mixer_settings
+        self.buffer_latency = AUDIO_BUFFER_SIZE / frequency * 1000
+
+        reserved = sum(CHANNEL_POOLS.values())
+        pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), reserved))
+        pygame.mixer.set_reserved(reserved)
+
+        channel_id = 0
+        for event, file_name in SOUND_FILES.items():
+            self._sounds[event] = self._load_sound(file_name)
+            self._channels[event] = [pygame.mixer.Channel(channel_id + i) for i in range(CHANNEL_POOLS[event])]
+            self._next_channel[event] = 0
+            channel_id += CHANNEL_POOLS[event]
+
+    def _load_sound(self, file_name: str) -> pygame.mixer.Sound:
+        path = os.path.join(SOUND_PATH, file_name)
+        if path not in self._sound_cache:
+            self._sound_cache[path] = self._trim_leading_silence(pygame.mixer.Sound(path))
+        return self._sound_cache[path]
+
+    @staticmethod
+    def _trim_leading_silence(sound: pygame.mixer.Sound) -> pygame.mixer.Sound:
+        _, size, channels = pygame.mixer.get_init()
+        if size != -16:
+            return sound
+
+        samples = array('h', sound.get_raw())
+        start = next((i for i, sample in enumerate(samples) if abs(sample) > AUDIO_SILENCE_THRESHOLD), 0)
+        start -= start % channels
+        return pygame.mixer.Sound(buffer=samples[start:].tobytes()) if start > 0 else sound
+
+    def _free_channel(self, event: SoundEvents) -> pygame.mixer.Channel:
+        channels = self._channels[event]
+        for channel in channels:
+            if not channel.get_busy():
+                return channel
+
+        channel = channels[self._next_channel[event]]
+        self._next_channel[event] = (self._next_channel[event] + 1) % len(channels)
+        return channel
+
+    def play(self, event: SoundEvents) -> Optional[pygame.mixer.Channel]:
+        sound = self._sounds.get(event, None)
+        if sound is None:
+            return None
+
+        current_time = pygame.time.get_ticks()
+        last_played = self._last_played.get(event, None)
+        if last_played is not None and current_time - last_played < AUDIO_COALESCE_WINDOW:
+            self.coalesced += 1
+            return None
+        self._last_played[event] = current_time
+
+        channel = self._free_channel(event)
+        channel.play(sound)
+        return channel
@@ -3,8 +3,6 @@ import sys
 from enum import Enum, auto
 from typing import Tuple
 
-import pygame
-
 # Game
 TITLE = 'Snake'
 FPS = 60
@@ -14,14 +12,36 @@ TILE_SIZE = 20
 PLAYING_FIELD_WIDTH, PLAYING_FIELD_HEIGHT = GRID_DIMENSION[0] * TILE_SIZE, GRID_DIMENSION[1] * TILE_SIZE
 PLAYING_UI_WIDTH, PLAYING_UI_HEIGHT = GRID_DIMENSION[0] * TILE_SIZE, 3 * TILE_SIZE
 WIDTH, HEIGHT = GRID_DIMENSION[0] * TILE_SIZE, GRID_DIMENSION[1] * TILE_SIZE + PLAYING_UI_HEIGHT
+HUD_SCORE_DIGITS = 7
 
 # Paths
 RES_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "res"))
 SOUND_PATH = os.path.join(RES_PATH, 'sounds')
 GUI_PATH = os.path.join(RES_PATH, 'gui_themes')
+LEVEL_PATH = os.path.join(RES_PATH, 'levels')
+HIGHSCORE_PATH = os.path.join('save_files', 'highscore.json')
+
+# Simulation
+SIMULATION_THREAD = False
+
+# Timers
+TIMER_WHEEL_SLOT_BITS = 6
+TIMER_WHEEL_LEVELS = 4
 
-# User events
-MOVE = pygame.USEREVENT + 1
+# Level
+DEFAULT_LEVEL = 'classic'
+FOOD_SPAWN_ATTEMPTS = 32
+FOOD_LIFETIME = 15000
+FOOD_COUNT = 1
+FOOD_TYPE_WEIGHTS = {'NORMAL': 85, 'BONUS': 12, 'GOLDEN': 3}
+FOOD_TYPE_MULTIPLIERS = {'NORMAL': 1, 'BONUS': 2, 'GOLDEN': 5}
+
+# Power-ups
+POWER_UP_INTERVAL = 12000
+POWER_UP_LIFETIME = 6000
+POWER_UP_DURATION = 5000
+SLOW_MO_FACTOR = 1.5
+SPEED_BOOST_FACTOR = 0.6
 
 # Snake
 EASY_SPEED = 180
@@ -29,6 +49,54 @@ MEDIUM_SPEED = 130
 HARD_SPEED = 90
 EXTREME_SPEED = 50
 
+# Input
+INPUT_BUFFER_SIZE = 3
+INPUT_LATENCY_BUCKET_WIDTH = 10
+INPUT_LATENCY_BUCKET_COUNT = 30
+
+# Telemetry
+TELEMETRY_ENABLED = True
+TELEMETRY_PATH = os.path.join('save_files', 'telemetry', 'telemetry.jsonl')
+TELEMETRY_BUFFER_SIZE = 4096
+TELEMETRY_BATCH_SIZE = 256
+TELEMETRY_FLUSH_INTERVAL = 1.0
+TELEMETRY_MAX_FILE_SIZE = 16 * 1024 * 1024
+TELEMETRY_BACKUP_COUNT = 8
+
+# Leaderboard
+LEADERBOARD_SIZE = 10
+LEADERBOARD_CHUNK_SIZE = 64 * 1024
+
+# Score sink
+SCORE_SINK_URL = None
+SCORE_SINK_QUEUE_PATH = os.path.join('save_files', 'score_queue.jsonl')
+SCORE_SINK_BATCH_SIZE = 16
+SCORE_SINK_BATCH_DELAY = 0.5
+SCORE_SINK_TIMEOUT = 5.0
+SCORE_SINK_RETRY_MIN = 1.0
+SCORE_SINK_RETRY_MAX = 60.0
+
+# Heatmap
+HEATMAP_PATH = os.path.join('save_files', 'heatmap.npz')
+HEATMAP_FLUSH_SIZE = 65536
+HEATMAP_OVERLAY_ALPHA = 160
+
+# Environment
+ENV_DEATH_REWARD = -100
+ENV_MAX_STEPS = 10000
+
+# Regression
+REGRESSION_MAX_TICKS = 2000
+REGRESSION_INPUT_RATE = 0.15
+REGRESSION_STEER_RATE = 0.5
+REGRESSION_ATTEMPTS = 10
+
+# Audio
+AUDIO_FREQUENCY = 44100
+AUDIO_BUFFER_SIZE = 256
+AUDIO_COALESCE_WINDOW = 40
+AUDIO_SILENCE_THRESHOLD = 256
+
 # Score
 SCORE_BASE = 70
 SCORE_EFFICIENCY_FACTOR = 4000
@@ -56,6 +124,11 @@ class ColorConfig:
         self.snake_head: Tuple[int, int, int] = (173, 255, 47)
         self.snake_tail: Tuple[int, int, int] = (34, 139, 34)
         self.food: Tuple[int, int, int] = (255, 69, 0)
+        self.bonus_food: Tuple[int, int, int] = (255, 165, 0)
+        self.golden_food: Tuple[int, int, int] = (255, 215, 0)
+        self.wall: Tuple[int, int, int] = (90, 90, 90)
+        self.power_up: Tuple[int, int, int] = (0, 191, 255)
+        self.heatmap: Tuple[int, int, int] = (255, 0, 0)
 
     def set_color_theme(self, theme: ColorTheme):
         match theme:
@@ -64,18 +137,38 @@ class ColorConfig:
                 self.snake_head = (173, 255, 47)
                 self.snake_tail = (34, 139, 34)
                 self.food = (255, 69, 0)
+                self.bonus_food = (255, 165, 0)
+                self.golden_food = (255, 215, 0)
+                self.wall = (90, 90, 90)
+                self.power_up = (0, 191, 255)
+                self.heatmap = (255, 0, 0)
             case ColorTheme.CYBER_RETRO:
                 self.background = (20, 20, 20)
                 self.snake_head = (0, 255, 180)
                 self.snake_tail = (0, 180, 130)
                 self.food = (255, 105, 180)
+                self.bonus_food = (186, 85, 211)
+                self.golden_food = (255, 255, 102)
+                self.wall = (60, 60, 90)
+                self.power_up = (255, 215, 0)
+                self.heatmap = (255, 0, 255)
             case ColorTheme.PIXEL_DESERT:
                 self.background = (48, 35, 24)
                 self.snake_head = (237, 201, 175)
                 self.snake_tail = (205, 133, 63)
                 self.food = (220, 20, 60)
+                self.bonus_food = (255, 140, 0)
+                self.golden_food = (255, 223, 0)
+                self.wall = (110, 80, 50)
+                self.power_up = (64, 224, 208)
+                self.heatmap = (255, 69, 0)
             case ColorTheme.FUTURE_MONOCHROME:
                 self.background = (25, 25, 25)
                 self.snake_head = (200, 200, 200)
                 self.snake_tail = (120, 120, 120)
                 self.food = (255, 255, 255)
+                self.bonus_food = (220, 220, 220)
+                self.golden_food = (240, 240, 240)
+                self.wall = (70, 70, 70)
+                self.power_up = (160, 160, 160)
+                self.heatmap = (255, 255, 255)
@@ -4,14 +4,19 @@ import os
 import pygame
 import pygame_gui
 
-from config import TITLE, WIDTH, HEIGHT, FPS, GUI_PATH
+from audio import AudioManager
+from config import TITLE, WIDTH, HEIGHT, FPS, GUI_PATH, AUDIO_BUFFER_SIZE
 from game_states import GameState, GameStates, MainMenu, Playing, Pause, GameOver
 from highscore_manager import HighscoreManager
+from score_sink import ScoreSink
+from telemetry import TelemetryLogger
 
 
 class Game:
     def __init__(self):
+        AudioManager.pre_init()
         pygame.init()
+        AudioManager.get_instance().load()
 
         pygame.display.set_caption(TITLE)
 
@@ -36,14 +41,25 @@ class Game:
         self.state.enter()
 
         HighscoreManager.get_instance().load()
+        TelemetryLogger.get_instance().start()
+        TelemetryLogger.get_instance().log('audio', buffer_size=AUDIO_BUFFER_SIZE,
+                                           buffer_latency=AudioManager.get_instance().buffer_latency)
+        ScoreSink.get_instance().start()
 
     def run(self) -> None:
         self.running = True
         while self.running:
-            delta = self.clock.tick(FPS)
-            self.state.update(delta)
-            self.state.draw(self.screen)
+            self.step(self.clock.tick(FPS))
 
+        self.shutdown()
+
+    def step(self, delta: float) -> None:
+        self.state.update(delta)
+        self.state.draw(self.screen)
+
+    def shutdown(self) -> None:
+        TelemetryLogger.get_instance().stop()
+        ScoreSink.get_instance().stop()
         pygame.quit()
 
     def stop(self) -> None:
@@ -1,16 +1,24 @@
+import time
+import zipfile
 from abc import ABC, abstractmethod
 from enum import Enum, auto
 from typing import Callable, Optional
 
-import os
 import pygame.event
 import pygame_gui
 
-from config import (PLAYING_FIELD_WIDTH, PLAYING_FIELD_HEIGHT, PLAYING_UI_HEIGHT, MOVE, SCORE_BASE,
-                    SCORE_EFFICIENCY_FACTOR, PICKUP_GROWTH_FACTOR, ColorTheme, ColorConfig, EASY_SPEED, MEDIUM_SPEED,
-                    HARD_SPEED, EXTREME_SPEED, SOUND_PATH)
+from audio import AudioManager, SoundEvents
+from config import (PLAYING_FIELD_WIDTH, PLAYING_FIELD_HEIGHT, PLAYING_UI_HEIGHT, ColorTheme, ColorConfig,
+                    INPUT_LATENCY_BUCKET_WIDTH, INPUT_LATENCY_BUCKET_COUNT, DEFAULT_LEVEL, SIMULATION_THREAD,
+                    HEATMAP_PATH, HEATMAP_OVERLAY_ALPHA)
+from heatmap import LAYERS, Heatmap
 from highscore_manager import HighscoreManager
-from snake import Direction, Food, Snake
+from level import Level
+from metrics import LatencyHistogram
+from score_sink import ScoreSink
+from simulation import DEATHS, Simulation, SimulationThread, TickOutcome
+from snake import Direction, draw_food, draw_power_up, draw_snake
+from telemetry import TelemetryLogger
 from user_interface import UserInterface, MainMenuUI, PlayingUI, UIEvents, SubUIs, PauseUI, GameOverUI
 
 
@@ -121,44 +129,63 @@ class Playing(GameState):
         self.color_config.set_color_theme(ColorTheme.NEON_GARDEN)
 
         self.player_name: str = ''
-        self.time_last_pickup: int = 0
-        self.pickup_count = 0
-        self.score: int = 0
+        self.level_name: str = DEFAULT_LEVEL
 
-        self.eat_sound = pygame.mixer.Sound(os.path.join(SOUND_PATH, 'eat_apple.wav'))
-        self.die_sound = pygame.mixer.Sound(os.path.join(SOUND_PATH, 'game_over.wav'))
+        self.audio: AudioManager = AudioManager.get_instance()
+        self.telemetry: TelemetryLogger = TelemetryLogger.get_instance()
 
-        self.snake: Snake = Snake()
-        self.food: Food = Food()
-        self.food.spawn(self.snake.get_positions())
+        self.input_latency: LatencyHistogram = LatencyHistogram(INPUT_LATENCY_BUCKET_WIDTH, INPUT_LATENCY_BUCKET_COUNT)
+        self.simulation: Simulation = Simulation(Level.load(self.level_name), self.input_latency)
+        self.simulation_thread: Optional[SimulationThread] = None
+        self.shown_pickup_count: int = 0
+        self.shown_power_up_count: int = 0
+
+        self.heatmap: Optional[Heatmap] = None
+        self.heatmap_layer: Optional[str] = None
+        self.heatmap_overlay: Optional[pygame.Surface] = None
 
     def _enter(self, options: Optional[dict[str, str]]) -> None:
         restart = options.get('restart', '0')
         if restart == '1':
-            self.time_last_pickup: int = 0
-            self.pickup_count = 0
-            self.score: int = 0
-            self.snake: Snake = Snake()
-            self.food: Food = Food()
-            self.food.spawn(self.snake.get_positions())
+            if self.simulation.tick_count > 0 and self.simulation.outcome not in DEATHS:
+                self._log_game_stats()
+            self.level_name = options.get('level', self.level_name)
+            self.simulation = Simulation(Level.load(self.level_name), self.input_latency)
             self.user_interface.receive_data({'score': '0'})
-            self.snake.move_rate = EASY_SPEED
 
         player_name = options.get('player_name', None)
         self.player_name = player_name if player_name is not None else self.player_name
         self.user_interface.receive_data(options)
+        if restart == '1':
+            self.telemetry.log('game_start', game=self.simulation.game_id, player=self.player_name,
+                               level=self.level_name)
 
-        passed_time = int(options.get('time_passed', 0))
-        self.time_last_pickup = pygame.time.get_ticks() if passed_time == 0 else self.time_last_pickup + passed_time
+        self.simulation.time_last_move = pygame.time.get_ticks()
+        self.simulation.resume()
 
-        pygame.time.set_timer(event=MOVE, millis=self.snake.move_rate)
+        if SIMULATION_THREAD:
+            self.shown_pickup_count = self.simulation.pickup_count
+            self.shown_power_up_count = self.simulation.power_up_count
+            self.simulation_thread = SimulationThread(self.simulation)
+            self.simulation_thread.start()
 
     def _exit(self) -> None:
-        pygame.time.set_timer(event=MOVE, millis=0)
+        if self.simulation_thread is not None:
+            self.simulation_thread.stop()
+            self.simulation_thread = None
+        self.simulation.pause()
+        self.simulation.snake.input_buffer.clear()
+
         highscores = HighscoreManager.get_instance().get()
         score = highscores.get(self.player_name, -1)
-        if self.score > score:
-            HighscoreManager.get_instance().update(self.player_name, self.score)
+        if self.simulation.score > score:
+            HighscoreManager.get_instance().update(self.player_name, self.simulation.score)
+
+    def _set_next_direction(self, direction: Direction) -> None:
+        if self.simulation_thread is not None:
+            self.simulation_thread.inputs.append((direction, pygame.time.get_ticks()))
+        else:
+            self.simulation.snake.set_next_direction(direction)
 
     def _handle_event(self, event: pygame.Event) -> None:
         match self.user_interface.check_event(event):
@@ -167,51 +194,98 @@ class Playing(GameState):
 
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_w:
-                self.snake.set_next_direction(Direction.UP)
+                self._set_next_direction(Direction.UP)
             elif event.key == pygame.K_s:
-                self.snake.set_next_direction(Direction.DOWN)
+                self._set_next_direction(Direction.DOWN)
             elif event.key == pygame.K_a:
-                self.snake.set_next_direction(Direction.LEFT)
+                self._set_next_direction(Direction.LEFT)
             elif event.key == pygame.K_d:
-                self.snake.set_next_direction(Direction.RIGHT)
+                self._set_next_direction(Direction.RIGHT)
+            elif event.key == pygame.K_h:
+                self._toggle_heatmap()
             elif event.key == pygame.K_ESCAPE:
                 self.change_game_state(GameStates.PAUSE, None)
-        elif event.type == MOVE:
-            self.snake.move()
-            if self.snake.collides_with_screen() or self.snake.collides_with_self():
-                self.die_sound.play()
-                self.change_game_state(GameStates.GAME_OVER, None)
-            elif self.snake.collides_with_food(self.food):
-                self.eat_sound.play()
-                self.snake.grow()
-                self.update_score()
-                self.food.spawn(self.snake.get_positions())
-
-    def _draw_contents(self, screen: pygame.Surface) -> None:
-        self.playing_flied.fill(self.color_config.background)
-        self.snake.draw(self.playing_flied)
-        self.food.draw(self.playing_flied)
-        screen.blit(self.playing_flied, dest=(0, PLAYING_UI_HEIGHT))
 
-    def update_score(self) -> None:
-        current_time = pygame.time.get_ticks()
-        time_since_last_pickup = current_time - self.time_last_pickup
-        self.time_last_pickup = current_time
+    def _toggle_heatmap(self) -> None:
+        if self.heatmap is None:
+            try:
+                self.heatmap = Heatmap.load(HEATMAP_PATH)
+            except (ImportError, OSError, zipfile.BadZipFile, ValueError, KeyError):
+                return
+
+        index = LAYERS.index(self.heatmap_layer) + 1 if self.heatmap_layer is not None else 0
+        self.heatmap_layer = LAYERS[index] if index < len(LAYERS) else None
+        self.heatmap_overlay = (self.heatmap.surface(self.heatmap_layer, self.color_config.heatmap,
+                                                     HEATMAP_OVERLAY_ALPHA)
+                                if self.heatmap_layer is not None else None)
+
+    def _log_game_stats(self) -> None:
+        self.telemetry.log('game_stats', game=self.simulation.game_id,
+                           input_latency_bucket_width=self.input_latency.bucket_width,
+                           input_latency_buckets=list(self.input_latency.buckets),
+                           input_latency_total=self.input_latency.total, input_latency_max=self.input_latency.max,
+                           dropped_inputs=self.simulation.snake.input_buffer.dropped,
+                           coalesced_sounds=self.audio.coalesced)
+        self.input_latency.reset()
+        self.audio.coalesced = 0
+
+    def _game_over(self) -> None:
+        self.audio.play(SoundEvents.GAME_OVER)
+        self._log_game_stats()
+        ScoreSink.get_instance().submit({'game': self.simulation.game_id, 'player': self.player_name,
+                                         'score': self.simulation.score, 'level': self.level_name,
+                                         'time': time.time()})
+        self.change_game_state(GameStates.GAME_OVER, None)
+
+    def _picked_up(self, score: int) -> None:
+        self.audio.play(SoundEvents.EAT)
+        self.user_interface.receive_data(data={'score': str(score)})
+
+    def _powered_up(self) -> None:
+        self.audio.play(SoundEvents.EAT)
 
-        self.pickup_count += 1
-        self.score += int((SCORE_BASE * (SCORE_EFFICIENCY_FACTOR / time_since_last_pickup)
-                           * (1 + self.pickup_count * PICKUP_GROWTH_FACTOR)))
-        self.user_interface.receive_data(data={'score': str(self.score)})
+    def update(self, delta: float) -> None:
+        self.simulation.frame_time = delta
+        super().update(delta)
+
+        if self.simulation_thread is not None:
+            snapshot = self.simulation_thread.latest()
+            if snapshot.pickup_count > self.shown_pickup_count:
+                self.shown_pickup_count = snapshot.pickup_count
+                self._picked_up(snapshot.score)
+            if snapshot.power_up_count > self.shown_power_up_count:
+                self.shown_power_up_count = snapshot.power_up_count
+                self._powered_up()
+            if snapshot.outcome in DEATHS:
+                self._game_over()
+        else:
+            for outcome in self.simulation.advance(round(delta)):
+                if outcome in DEATHS:
+                    self._game_over()
+                elif outcome == TickOutcome.ATE:
+                    self._picked_up(self.simulation.score)
+                elif outcome == TickOutcome.POWERED_UP:
+                    self._powered_up()
 
-        if self.score >= 500:
-            self.snake.move_rate = MEDIUM_SPEED
-            pygame.time.set_timer(event=MOVE, millis=self.snake.move_rate)
-        elif self.score >= 3000:
-            self.snake.move_rate = HARD_SPEED
-            pygame.time.set_timer(event=MOVE, millis=self.snake.move_rate)
-        elif self.score >= 10000:
-            self.snake.move_rate = EXTREME_SPEED
-            pygame.time.set_timer(event=MOVE, millis=self.snake.move_rate)
+    def _draw_contents(self, screen: pygame.Surface) -> None:
+        self.playing_flied.blit(self.simulation.level.background(self.color_config), (0, 0))
+        if self.simulation_thread is not None:
+            snapshot = self.simulation_thread.latest()
+            alpha = min((pygame.time.get_ticks() - snapshot.time_last_move) / snapshot.move_rate, 1.0)
+            draw_snake(self.playing_flied, snapshot.positions, snapshot.previous_head_position,
+                       snapshot.previous_tail_position, alpha)
+            for position, food_type in snapshot.foods:
+                draw_food(self.playing_flied, position, food_type)
+            if snapshot.power_up_position is not None:
+                draw_power_up(self.playing_flied, snapshot.power_up_position)
+        else:
+            self.simulation.snake.draw(self.playing_flied, self.simulation.tick_progress())
+            self.simulation.food.draw(self.playing_flied)
+            if self.simulation.power_up is not None:
+                draw_power_up(self.playing_flied, self.simulation.power_up_food.position)
+        if self.heatmap_overlay is not None:
+            self.playing_flied.blit(self.heatmap_overlay, (0, 0))
+        screen.blit(self.playing_flied, dest=(0, PLAYING_UI_HEIGHT))
 
 
 class Pause(GameState):
@@ -220,10 +294,8 @@ class Pause(GameState):
                  stop_game: Callable[[], None]):
         super().__init__(change_game_state, stop_game, user_interface=PauseUI(manager))
 
-        self.time_entered = 0
-
     def _enter(self, options: Optional[dict[str, str]]) -> None:
-        self.time_entered = pygame.time.get_ticks()
+        pass
 
     def _exit(self) -> None:
         pass
@@ -231,8 +303,7 @@ class Pause(GameState):
     def _handle_event(self, event: pygame.Event) -> None:
         match self.user_interface.check_event(event):
             case UIEvents.PS_RESUME:
-                time_passed = pygame.time.get_ticks() - self.time_entered
-                self.change_game_state(GameStates.PLAYING, {'time_passed': str(time_passed)})
+                self.change_game_state(GameStates.PLAYING, {})
             case UIEvents.PS_MENU:
                 self.change_game_state(GameStates.MAIN_MENU, None)
             case UIEvents.PS_QUIT:
@@ -0,0 +1,276 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import random
+from array import array
+from typing import Iterable, Optional, Tuple
+
+import pygame
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from config import GRID_DIMENSION, TILE_SIZE, TELEMETRY_PATH, HEATMAP_PATH, HEATMAP_FLUSH_SIZE, DEFAULT_LEVEL
+from level import Level
+from simulation import DEATHS, Simulation
+from snake import DIRECTION_OFFSETS, Direction
+from telemetry_report import open_log
+
+LAYERS = ('visits', 'deaths', 'food_spawns', 'food_eats')
+
+EVENT_LAYERS = {
+    'tick': 'visits',
+    'death': 'deaths',
+    'food_spawn': 'food_spawns',
+    'pickup': 'food_eats'
+}
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError('numpy is required for heatmaps, install the analytics extra')
+
+
+class Heatmap:
+    def __init__(self, counts: Optional['np.ndarray'] = None, games: int = 0):
+        _require_numpy()
+        width, height = GRID_DIMENSION
+        self.counts: np.ndarray = (counts if counts is not None
+                                   else np.zeros((len(LAYERS), height, width), dtype=np.int64))
+        self.games: int = games
+        self.malformed: int = 0
+
+    def layer(self, name: str) -> 'np.ndarray':
+        return self.counts[LAYERS.index(name)]
+
+    def add(self, name: str, xs: 'np.ndarray', ys: 'np.ndarray') -> None:
+        width, height = GRID_DIMENSION
+        cells = np.clip(ys, 0, height - 1).astype(np.intp) * width + np.clip(xs, 0, width - 1)
+        self.layer(name)[...] += np.bincount(cells, minlength=width * height).reshape(height, width)
+
+    def merge(self, other: 'Heatmap') -> 'Heatmap':
+        self.counts += other.counts
+        self.games += other.games
+        self.malformed += other.malformed
+        return self
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(path, counts=self.counts, games=self.games)
+
+    @classmethod
+    def load(cls, path: str) -> 'Heatmap':
+        _require_numpy()
+        width, height = GRID_DIMENSION
+        with np.load(path) as data:
+            counts = data['counts']
+            if counts.shape != (len(LAYERS), height, width):
+                raise ValueError(f'{path} holds a {counts.shape} heatmap, expected {(len(LAYERS), height, width)}')
+            return cls(counts, int(data['games']))
+
+    def uniformity(self, name: str, level: Level) -> Tuple[float, int]:
+        width, height = GRID_DIMENSION
+        free = np.frombuffer(level.walls, dtype=np.uint8).reshape(height, width) == 0
+        observed = self.layer(name)[free]
+        expected = observed.sum() / observed.size
+        if expected == 0:
+            return 0.0, observed.size - 1
+        return float(((observed - expected) ** 2 / expected).sum()), observed.size - 1
+
+    def hottest(self, name: str, top: int) -> list[Tuple[Tuple[int, int], int]]:
+        layer = self.layer(name)
+        cells = np.argsort(layer, axis=None)[::-1][:top]
+        return [((int(cell % layer.shape[1]), int(cell // layer.shape[1])), int(layer.flat[cell])) for cell in cells
+                if layer.flat[cell] > 0]
+
+    def surface(self, name: str, color: Tuple[int, int, int], alpha: int) -> pygame.Surface:
+        layer = self.layer(name)
+        surface = pygame.Surface(GRID_DIMENSION, pygame.SRCALPHA)
+        surface.fill((*color, 0))
+        peak = layer.max()
+        if peak > 0:
+            alphas = pygame.surfarray.pixels_alpha(surface)
+            alphas[...] = (layer.T * alpha // peak).astype(np.uint8)
+            del alphas
+        return pygame.transform.scale(surface, (GRID_DIMENSION[0] * TILE_SIZE, GRID_DIMENSION[1] * TILE_SIZE))
+
+    def print(self, level: Level, top: int) -> None:
+        print(f'games: {self.games}')
+        if self.malformed:
+            print(f'malformed records: {self.malformed}')
+        for name in LAYERS:
+            print(f'{name}: {int(self.layer(name).sum())}')
+
+        chi2, dof = self.uniformity('food_spawns', level)
+        print(f'food spawn uniformity over free cells of {level.name!r}: chi2={chi2:.1f} dof={dof} '
+              f'(chi2/dof={chi2 / max(dof, 1):.2f}, ~1 when unbiased)')
+        print(f'hottest death cells: {self.hottest("deaths", top)}')
+
+
+def _is_coordinate(value: object, size: int) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and -1 <= value <= size
+
+
+class HeatmapRecorder:
+    def __init__(self, heatmap: Heatmap):
+        self.heatmap: Heatmap = heatmap
+        self._xs: dict[str, array] = {name: array('h') for name in LAYERS}
+        self._ys: dict[str, array] = {name: array('h') for name in LAYERS}
+        self._pending: int = 0
+
+    def log(self, event: str, **fields) -> None:
+        name = EVENT_LAYERS.get(event, None)
+        if name is None:
+            return
+
+        positions = fields.get('positions', ()) if event == 'food_spawn' else (fields.get('head', None),)
+        xs, ys = self._xs[name], self._ys[name]
+        for position in positions:
+            if position is None:
+                continue
+            try:
+                x, y = position
+            except (TypeError, ValueError):
+                self.heatmap.malformed += 1
+                continue
+            if not _is_coordinate(x, GRID_DIMENSION[0]) or not _is_coordinate(y, GRID_DIMENSION[1]):
+                self.heatmap.malformed += 1
+                continue
+            xs.append(x)
+            ys.append(y)
+            self._pending += 1
+
+        if self._pending >= HEATMAP_FLUSH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        for name in LAYERS:
+            if self._xs[name]:
+                self.heatmap.add(name, np.frombuffer(self._xs[name], dtype=np.int16),
+                                 np.frombuffer(self._ys[name], dtype=np.int16))
+                self._xs[name] = array('h')
+                self._ys[name] = array('h')
+        self._pending = 0
+
+
+def _steer(simulation: Simulation, rng: random.Random) -> None:
+    snake = simulation.snake
+    if rng.random() < 0.1:
+        snake.set_next_direction(rng.choice(list(Direction)))
+        return
+
+    target = next(iter(simulation.food.items()), None)
+    if target is None:
+        return
+    (food_x, food_y), _ = target
+    head_x, head_y = snake.head_position
+    for direction, (x_fac, y_fac) in DIRECTION_OFFSETS.items():
+        if x_fac * (food_x - head_x) > 0 or y_fac * (food_y - head_y) > 0:
+            snake.set_next_direction(direction)
+            return
+
+
+def run_games(level_name: str, games: int, seed: int, max_ticks: int) -> Heatmap:
+    random.seed(seed)
+    rng = random.Random(seed)
+    level = Level.load(level_name)
+    heatmap = Heatmap()
+    recorder = HeatmapRecorder(heatmap)
+
+    for _ in range(games):
+        simulation = Simulation(level)
+        simulation.telemetry = recorder
+        recorder.log('food_spawn', positions=[position for position, _ in simulation.food.items()])
+        for _ in range(max_ticks):
+            _steer(simulation, rng)
+            if any(outcome in DEATHS for outcome in simulation.advance(simulation.time_until_move())):
+                break
+        heatmap.games += 1
+
+    recorder.flush()
+    return heatmap
+
+
+def aggregate_log(path: str) -> Heatmap:
+    heatmap = Heatmap()
+    recorder = HeatmapRecorder(heatmap)
+    with open_log(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                heatmap.malformed += 1
+                continue
+            if not isinstance(record, dict) or 'event' not in record:
+                heatmap.malformed += 1
+                continue
+            if record['event'] == 'game_start':
+                heatmap.games += 1
+            try:
+                recorder.log(**record)
+            except (TypeError, ValueError, OverflowError):
+                heatmap.malformed += 1
+
+    recorder.flush()
+    return heatmap
+
+
+def merge(heatmaps: Iterable[Heatmap]) -> Heatmap:
+    total = Heatmap()
+    for heatmap in heatmaps:
+        total.merge(heatmap)
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Accumulate per-cell head visits, deaths, food spawns and food eats '
+                                                 'across headless games or recorded telemetry.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    games_parser = subparsers.add_parser('games', help='play headless games with a simple bot')
+    games_parser.add_argument('--games', type=int, default=1000)
+    games_parser.add_argument('--max-ticks', type=int, default=5000, help='ticks before a game is abandoned')
+    games_parser.add_argument('--seed', type=int, default=0)
+
+    logs_parser = subparsers.add_parser('logs', help='aggregate recorded telemetry logs')
+    logs_parser.add_argument('paths', nargs='*', default=[TELEMETRY_PATH + '*'],
+                             help='log files or glob patterns, plain or .gz')
+
+    subparsers.add_parser('report', help='print a saved heatmap')
+
+    for subparser in subparsers.choices.values():
+        subparser.add_argument('--level', default=DEFAULT_LEVEL)
+        subparser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+        subparser.add_argument('--out', default=HEATMAP_PATH, help='heatmap file to write or read')
+        subparser.add_argument('--merge', action='store_true', help='add to the existing heatmap file')
+        subparser.add_argument('--top', type=int, default=5, help='number of hottest death cells to print')
+    args = parser.parse_args()
+
+    if args.command == 'report':
+        heatmap = Heatmap.load(args.out)
+    else:
+        if args.command == 'games':
+            workers = max(min(args.workers, args.games), 1)
+            jobs = [(args.level, args.games // workers + (worker < args.games % workers), args.seed + worker,
+                     args.max_ticks) for worker in range(workers)]
+            with multiprocessing.Pool(workers) as pool:
+                heatmap = merge(pool.starmap(run_games, jobs))
+        else:
+            paths = sorted(path for pattern in args.paths for path in glob.glob(pattern))
+            with multiprocessing.Pool(max(min(args.workers, len(paths)), 1)) as pool:
+                heatmap = merge(pool.imap_unordered(aggregate_log, paths))
+
+        if args.merge:
+            try:
+                heatmap.merge(Heatmap.load(args.out))
+            except FileNotFoundError:
+                pass
+        heatmap.save(args.out)
+
+    heatmap.print(Level.load(args.level), args.top)
+
+
+if __name__ == '__main__':
+    main()
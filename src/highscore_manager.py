@@ -1,4 +1,10 @@
+import gzip
 import json
+from typing import Any, Iterator, TextIO, Tuple
+
+from config import HIGHSCORE_PATH, LEADERBOARD_CHUNK_SIZE
+
+SCALAR_DELIMITERS = ' \t\r\n,:]}'
 
 
 class HighscoreManager:
@@ -11,21 +17,107 @@ class HighscoreManager:
 
         return cls._instance
 
-    def __init__(self):
+    def __init__(self, path: str = HIGHSCORE_PATH):
+        self.path: str = path
         self._highscores: dict[str, int] = {}
 
     def update(self, name: str, score: int) -> None:
         self._highscores[name] = score
         self.save()
 
+    def replace(self, highscores: dict[str, int]) -> None:
+        self._highscores = dict(highscores)
+        self.save()
+
     def get(self) -> dict[str, int]:
         self.load()
         return self._highscores
 
     def save(self) -> None:
-        with open('save_files/highscore.json', 'w') as f:
+        with open(self.path, 'w') as f:
             json.dump(self._highscores, f, indent=4)
 
     def load(self) -> None:
-        with open('save_files/highscore.json', 'r') as f:
+        with open(self.path, 'r') as f:
             self._highscores = json.load(f)
+
+    @staticmethod
+    def iter_scores(path: str, chunk_size: int = LEADERBOARD_CHUNK_SIZE) -> Iterator[Tuple[Any, Any]]:
+        with (gzip.open(path, 'rt') if path.endswith('.gz') else open(path, 'r')) as f:
+            if path.removesuffix('.gz').endswith('.jsonl'):
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        if not isinstance(record, dict):
+                            continue
+                        yield record.get('name', record.get('player', None)), record.get('score', None)
+            else:
+                yield from JsonObjectStream(f, chunk_size).items()
+
+
+class JsonObjectStream:
+    def __init__(self, f: TextIO, chunk_size: int):
+        self._f: TextIO = f
+        self._chunk_size: int = chunk_size
+        self._decoder: json.JSONDecoder = json.JSONDecoder()
+        self._buffer: str = ''
+        self._position: int = 0
+        self._eof: bool = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+
+        chunk = self._f.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+
+        self._buffer = self._buffer[self._position:] + chunk
+        self._position = 0
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            while self._position < len(self._buffer) and self._buffer[self._position] in ' \t\r\n':
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._fill():
+                return ''
+
+    def _expect(self, chars: str) -> str:
+        char = self._peek()
+        if char == '' or char not in chars:
+            raise ValueError(f'Expected one of {chars!r} at offset {self._position}, found {char!r}')
+        self._position += 1
+        return char
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+                if (isinstance(value, (str, list, dict)) or self._eof
+                        or end < len(self._buffer) and self._buffer[end] in SCALAR_DELIMITERS):
+                    self._position = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill()
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        self._expect('{')
+        if self._peek() == '}':
+            self._position += 1
+            return
+
+        while True:
+            key = self._value()
+            if not isinstance(key, str):
+                raise ValueError(f'Expected a string key, found {key!r}')
+            self._expect(':')
+            yield key, self._value()
+            if self._expect(',}') == '}':
+                return
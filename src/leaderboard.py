@@ -0,0 +1,91 @@
+import argparse
+import glob
+import heapq
+from typing import Tuple
+
+from config import LEADERBOARD_SIZE, LEADERBOARD_CHUNK_SIZE
+from highscore_manager import HighscoreManager
+
+
+class Leaderboard:
+    def __init__(self, size: int = LEADERBOARD_SIZE):
+        self.size: int = size
+        self._heap: list[Tuple[int, str]] = []
+        self._best: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._best)
+
+    def _drop_stale(self) -> None:
+        while self._heap and self._best.get(self._heap[0][1], None) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def _compact(self) -> None:
+        if len(self._heap) > 2 * self.size:
+            self._heap = [(score, name) for name, score in self._best.items()]
+            heapq.heapify(self._heap)
+
+    def add(self, name: str, score: int) -> None:
+        best = self._best.get(name, None)
+        if best is not None:
+            if score > best:
+                self._best[name] = score
+                heapq.heappush(self._heap, (score, name))
+                self._compact()
+            return
+
+        if len(self._best) < self.size:
+            self._best[name] = score
+            heapq.heappush(self._heap, (score, name))
+            return
+
+        self._drop_stale()
+        lowest_score, lowest_name = self._heap[0]
+        if score <= lowest_score:
+            return
+
+        heapq.heapreplace(self._heap, (score, name))
+        del self._best[lowest_name]
+        self._best[name] = score
+
+    def top(self) -> list[Tuple[str, int]]:
+        return sorted(self._best.items(), key=lambda item: (-item[1], item[0]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Merge many highscore files or JSON-lines exports into one global '
+                                                 'top-N leaderboard, keeping each player\'s best score.')
+    parser.add_argument('paths', nargs='+', help='highscore .json files, .jsonl exports (optionally .gz) or glob '
+                                                 'patterns, ** matches directories recursively')
+    parser.add_argument('--top', type=int, default=LEADERBOARD_SIZE, help='number of players to keep')
+    parser.add_argument('--chunk-size', type=int, default=LEADERBOARD_CHUNK_SIZE, help='bytes read per chunk')
+    parser.add_argument('--out', default=None, help='write the merged leaderboard as a highscore file')
+    args = parser.parse_args()
+
+    leaderboard = Leaderboard(args.top)
+    files = 0
+    entries = 0
+    skipped = 0
+    for pattern in args.paths:
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            files += 1
+            try:
+                for name, score in HighscoreManager.iter_scores(path, args.chunk_size):
+                    if not isinstance(name, str) or not isinstance(score, int) or isinstance(score, bool):
+                        skipped += 1
+                        continue
+                    entries += 1
+                    leaderboard.add(name, score)
+            except (OSError, ValueError) as e:
+                print(f'{path}: {e}')
+
+    print(f'files: {files} entries: {entries} skipped: {skipped}')
+    for rank, (name, score) in enumerate(leaderboard.top(), start=1):
+        print(f'{rank:>4}. {name:<12} {score}')
+
+    if args.out is not None:
+        HighscoreManager(args.out).replace(dict(leaderboard.top()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+import json
+import os
+from typing import Optional, Tuple
+
+import pygame
+
+from config import GRID_DIMENSION, TILE_SIZE, LEVEL_PATH, PLAYING_FIELD_WIDTH, PLAYING_FIELD_HEIGHT, ColorConfig
+
+WALL = '#'
+EMPTY = '.'
+SPAWN = 'S'
+
+
+class Level:
+    _cache: dict[str, 'Level'] = {}
+
+    @classmethod
+    def load(cls, name: str) -> 'Level':
+        if name not in cls._cache:
+            with open(os.path.join(LEVEL_PATH, name + '.json'), 'r') as f:
+                cls._cache[name] = cls.compile(name, json.load(f))
+        return cls._cache[name]
+
+    @classmethod
+    def compile(cls, name: str, data: dict) -> 'Level':
+        width, height = GRID_DIMENSION
+        rows = data['map']
+        if len(rows) != height or any(len(row) != width for row in rows):
+            raise ValueError(f'Level {name!r} must be a {width}x{height} map')
+
+        walls = bytearray(width * height)
+        spawn_cells = []
+        for y, row in enumerate(rows):
+            for x, tile in enumerate(row):
+                if tile == WALL:
+                    walls[y * width + x] = 1
+                elif tile == SPAWN:
+                    spawn_cells.append((x, y))
+                elif tile != EMPTY:
+                    raise ValueError(f'Level {name!r} has unknown tile {tile!r} at {(x, y)}')
+
+        if not spawn_cells:
+            spawn_cells = [(x, y) for x in range(2, width - 2) for y in range(2, height - 2)
+                           if not walls[y * width + x]]
+
+        return cls(data.get('name', name), bool(data.get('wrap', False)), walls, spawn_cells)
+
+    def __init__(self, name: str, wrap: bool, walls: bytearray, spawn_cells: list[Tuple[int, int]]):
+        self.name: str = name
+        self.wrap: bool = wrap
+        self.walls: bytearray = walls
+        self.spawn_cells: list[Tuple[int, int]] = spawn_cells
+        self._background: Optional[pygame.Surface] = None
+        self._background_colors: Optional[tuple] = None
+
+    def wrap_position(self, position: Tuple[int, int]) -> Tuple[int, int]:
+        if not self.wrap:
+            return position
+        x, y = position
+        return x % GRID_DIMENSION[0], y % GRID_DIMENSION[1]
+
+    def is_wall(self, position: Tuple[int, int]) -> bool:
+        x, y = position
+        if 0 <= x < GRID_DIMENSION[0] and 0 <= y < GRID_DIMENSION[1]:
+            return self.walls[y * GRID_DIMENSION[0] + x] == 1
+        return False
+
+    def background(self, color_config: ColorConfig) -> pygame.Surface:
+        colors = (color_config.background, color_config.wall)
+        if self._background is None or self._background_colors != colors:
+            self._background = pygame.Surface((PLAYING_FIELD_WIDTH, PLAYING_FIELD_HEIGHT))
+            self._background.fill(color_config.background)
+            for cell, wall in enumerate(self.walls):
+                if wall:
+                    y, x = divmod(cell, GRID_DIMENSION[0])
+                    pygame.draw.rect(self._background, color_config.wall,
+                                     pygame.Rect(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE))
+            self._background_colors = colors
+        return self._background
@@ -0,0 +1,74 @@
+import argparse
+import gc
+import sys
+import tracemalloc
+
+import snake as snake_module
+from config import GRID_DIMENSION
+from snake import Direction, Snake
+
+FOOD_CLASS = getattr(snake_module, 'FoodField', snake_module.Food)
+BOARD_CELLS = GRID_DIMENSION[0] * GRID_DIMENSION[1]
+PREALLOCATED_BUFFERS = ('_xs', '_ys', '_occupancy')
+
+LOOP = [Direction.RIGHT, Direction.RIGHT, Direction.DOWN, Direction.DOWN,
+        Direction.LEFT, Direction.LEFT, Direction.UP, Direction.UP]
+
+
+def traced_bytes(build) -> tuple[int, object]:
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return used, result
+
+
+def set_direction(snake: Snake, direction: Direction) -> None:
+    getattr(snake, 'head', snake).next_dir = direction
+
+
+def grown_snake(segments: int) -> Snake:
+    snake = Snake()
+    for i in range(segments - 3):
+        set_direction(snake, LOOP[i % len(LOOP)])
+        snake.move()
+        snake.grow()
+    return snake
+
+
+def bytes_per_segment(segments: int) -> float:
+    short_snake, _ = traced_bytes(lambda: grown_snake(3))
+    long_snake, _ = traced_bytes(lambda: grown_snake(segments))
+    return (long_snake - short_snake) / (segments - 3)
+
+
+def preallocated_bytes_per_cell() -> float:
+    snake = Snake()
+    preallocated = sum(sys.getsizeof(getattr(snake, name)) for name in PREALLOCATED_BUFFERS if hasattr(snake, name))
+    return preallocated / BOARD_CELLS
+
+
+def bytes_per_game(games: int) -> float:
+    used, _ = traced_bytes(lambda: [(Snake(), FOOD_CLASS()) for _ in range(games)])
+    return used / games
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measure snake memory usage with tracemalloc.')
+    parser.add_argument('--segments', type=int, default=500, help='length of the long snake')
+    parser.add_argument('--games', type=int, default=1000, help='number of games kept alive at once')
+    args = parser.parse_args()
+    if not 3 < args.segments <= BOARD_CELLS:
+        parser.error(f'--segments must be between 4 and {BOARD_CELLS}, the number of board cells')
+
+    grown_snake(3)
+    print(f'preallocated bytes per board cell: {preallocated_bytes_per_cell():.1f} ({BOARD_CELLS} cells)')
+    print(f'bytes per extra segment:           {bytes_per_segment(args.segments):.1f} (beyond the preallocation)')
+    print(f'bytes per game:                    {bytes_per_game(args.games):.1f} (Snake and {FOOD_CLASS.__name__})')
+
+
+if __name__ == '__main__':
+    main()
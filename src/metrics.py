@@ -0,0 +1,53 @@
+class LatencyHistogram:
+    __slots__ = ('bucket_width', 'buckets', 'count', 'total', 'max', 'unit')
+
+    def __init__(self, bucket_width: int, bucket_count: int, unit: str = 'ms'):
+        self.bucket_width: int = bucket_width
+        self.buckets: list[int] = [0] * bucket_count
+        self.count: int = 0
+        self.total: int = 0
+        self.max: int = 0
+        self.unit: str = unit
+
+    def record(self, latency: int) -> None:
+        latency = max(latency, 0)
+        index = min(latency // self.bucket_width, len(self.buckets) - 1)
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += latency
+        self.max = max(self.max, latency)
+
+    def merge(self, buckets: list[int], total: int, maximum: int) -> None:
+        if len(buckets) != len(self.buckets):
+            raise ValueError(f'Expected {len(self.buckets)} buckets, found {len(buckets)}')
+        self.buckets = [count + other for count, other in zip(self.buckets, buckets)]
+        self.count += sum(buckets)
+        self.total += total
+        self.max = max(self.max, maximum)
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count > 0 else 0.0
+
+    def percentile(self, p: float) -> int:
+        if self.count == 0:
+            return 0
+
+        threshold = self.count * p / 100
+        seen = 0
+        for i, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= threshold:
+                return min((i + 1) * self.bucket_width, self.max)
+
+        return self.max
+
+    def reset(self) -> None:
+        self.buckets = [0] * len(self.buckets)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def __str__(self) -> str:
+        u = self.unit
+        return (f'n={self.count} mean={self.mean():.1f}{u} p50={self.percentile(50)}{u} '
+                f'p95={self.percentile(95)}{u} p99={self.percentile(99)}{u} max={self.max}{u}')
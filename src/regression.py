@@ -0,0 +1,344 @@
+import argparse
+import gzip
+import importlib
+import json
+import lzma
+import multiprocessing
+import random
+import zlib
+from array import array
+from collections import Counter, deque
+from itertools import product
+from typing import Iterator, Optional, TextIO, Tuple
+
+from config import (GRID_DIMENSION, SCORE_BASE, SCORE_EFFICIENCY_FACTOR, PICKUP_GROWTH_FACTOR, EASY_SPEED,
+                    MEDIUM_SPEED, HARD_SPEED, EXTREME_SPEED, REGRESSION_MAX_TICKS, REGRESSION_INPUT_RATE,
+                    REGRESSION_STEER_RATE, REGRESSION_ATTEMPTS, INPUT_BUFFER_SIZE)
+from level import Level
+from simulation import DEATHS, Simulation, TickOutcome
+from snake import DIRECTION_OFFSETS, OPPOSITE_DIRECTIONS, Direction, FoodField, FoodType, Snake, cell_index
+
+BASELINE_LEVEL = 'classic'
+DEATH_NAMES = {outcome.name for outcome in DEATHS}
+
+
+def body_crc(positions: Iterator[Tuple[int, int]]) -> int:
+    body = array('h')
+    for position in positions:
+        body.extend(position)
+    return zlib.crc32(body.tobytes())
+
+
+class ReferenceEngine:
+    def __init__(self, start: list, foods: list, rng: Optional[random.Random] = None):
+        x, y, direction = start
+        self.direction: Direction = Direction[direction]
+        self.next_direction: Direction = self.direction
+        x_fac, y_fac = DIRECTION_OFFSETS[self.direction]
+        self.body: list[Tuple[int, int]] = [(x - i * x_fac, y - i * y_fac) for i in range(3)]
+        self.grow_position: Tuple[int, int] = (0, 0)
+        self.move_rate: int = EASY_SPEED
+
+        self.time: int = 0
+        self.time_last_pickup: int = 0
+        self.pickup_count: int = 0
+        self.score: int = 0
+
+        self.foods: list = foods
+        self.food: Optional[Tuple[int, int]] = None
+        self._next_food: int = 0
+        self._rng: Optional[random.Random] = rng
+        self._spawn_food()
+
+    def _spawn_food(self) -> None:
+        if self._next_food == len(self.foods) and self._rng is not None:
+            free = sorted(set(product(range(GRID_DIMENSION[0]), range(GRID_DIMENSION[1]))) - set(self.body))
+            if free:
+                self.foods.append(list(self._rng.choice(free)))
+
+        self.food = None
+        if self._next_food < len(self.foods):
+            self.food = tuple(self.foods[self._next_food])
+            self._next_food += 1
+
+    def set_next_direction(self, direction: Direction) -> None:
+        if {self.direction, direction} in OPPOSITE_DIRECTIONS:
+            return
+        self.next_direction = direction
+
+    def update_score(self) -> None:
+        time_since_last_pickup = self.time - self.time_last_pickup
+        self.time_last_pickup = self.time
+
+        self.pickup_count += 1
+        self.score += int((SCORE_BASE * (SCORE_EFFICIENCY_FACTOR / time_since_last_pickup)
+                           * (1 + self.pickup_count * PICKUP_GROWTH_FACTOR)))
+
+        if self.score >= 500:
+            self.move_rate = MEDIUM_SPEED
+        elif self.score >= 3000:
+            self.move_rate = HARD_SPEED
+        elif self.score >= 10000:
+            self.move_rate = EXTREME_SPEED
+
+    def tick(self) -> list:
+        self.time += self.move_rate
+        self.grow_position = self.body[-1]
+        self.direction = self.next_direction
+
+        x, y = self.body[0]
+        x_fac, y_fac = DIRECTION_OFFSETS[self.direction]
+        self.body = [(x + x_fac, y + y_fac)] + self.body[:-1]
+        head = self.body[0]
+
+        if not (0 <= head[0] < GRID_DIMENSION[0] and 0 <= head[1] < GRID_DIMENSION[1]):
+            outcome = TickOutcome.HIT_SCREEN
+        elif head in self.body[1:]:
+            outcome = TickOutcome.HIT_SELF
+        elif head == self.food:
+            self.body.append(self.grow_position)
+            self.update_score()
+            self._spawn_food()
+            outcome = TickOutcome.ATE
+        else:
+            outcome = TickOutcome.MOVED
+
+        return [outcome.name, *head, *self.body[-1], len(self.body), *self.grow_position, self.score, self.move_rate,
+                list(self.food) if self.food is not None else [], body_crc(self.body)]
+
+
+class QueuedReferenceEngine(ReferenceEngine):
+    def __init__(self, start: list, foods: list, rng: Optional[random.Random] = None):
+        super().__init__(start, foods, rng)
+        self.queue: deque[Direction] = deque()
+
+    def set_next_direction(self, direction: Direction) -> None:
+        previous = self.queue[-1] if self.queue else self.direction
+        if direction == previous or {previous, direction} in OPPOSITE_DIRECTIONS:
+            return
+        if len(self.queue) < INPUT_BUFFER_SIZE:
+            self.queue.append(direction)
+
+    def tick(self) -> list:
+        if self.queue:
+            self.next_direction = self.queue.popleft()
+        return super().tick()
+
+
+INPUT_MODES = {
+    'queued': QueuedReferenceEngine,
+    'baseline': ReferenceEngine
+}
+
+
+class ScriptedSnake(Snake):
+    __slots__ = ('_start',)
+
+    def __init__(self, start: list, level: Level):
+        self._start: list = start
+        super().__init__(level=level)
+
+    def _find_spawn(self) -> Tuple[list[Tuple[int, int]], Direction]:
+        x, y, direction = self._start
+        x_fac, y_fac = DIRECTION_OFFSETS[Direction[direction]]
+        return [(x - i * x_fac, y - i * y_fac) for i in range(3)], Direction[direction]
+
+
+class ScriptedFoodField(FoodField):
+    __slots__ = ('_foods',)
+
+    def __init__(self, foods: list):
+        super().__init__(1)
+        self._foods: Iterator[list] = iter(foods)
+
+    def respawn(self, level: Level, snake: Snake, blocked: Optional[Tuple[int, int]] = None) -> list[Tuple[int, int]]:
+        position = next(self._foods, None) if not len(self) else None
+        if position is None:
+            return []
+        self._cells[cell_index(tuple(position))] = FoodType.NORMAL
+        return [tuple(position)]
+
+
+class BaselineSimulation(Simulation):
+    def __init__(self, start: list, foods: list):
+        super().__init__(Level.load(BASELINE_LEVEL))
+        self.snake = ScriptedSnake(start, self.level)
+        self.food = ScriptedFoodField(foods)
+        self._spawn_food()
+
+    def _spawn_food(self) -> None:
+        self.food.respawn(self.level, self.snake)
+
+    def _spawn_power_up(self) -> None:
+        pass
+
+
+class SimulationEngine:
+    def __init__(self, start: list, foods: list):
+        self.simulation: Simulation = BaselineSimulation(start, foods)
+
+    def set_next_direction(self, direction: Direction) -> None:
+        self.simulation.snake.set_next_direction(direction, 0)
+
+    def tick(self) -> list:
+        simulation = self.simulation
+        outcomes = []
+        while not outcomes:
+            outcomes = simulation.advance(simulation.time_until_move())
+        assert len(outcomes) == 1, f'expected one move per tick, got {outcomes}'
+
+        snake = simulation.snake
+        return [outcomes[0].name, *snake.head_position, *snake.tail_position, len(snake), *snake.grow_position,
+                simulation.score, simulation.move_interval,
+                [coordinate for position, _ in sorted(simulation.food.items()) for coordinate in position],
+                body_crc(snake.positions())]
+
+
+def load_engine(spec: str) -> type:
+    module_name, _, class_name = spec.partition(':')
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def open_corpus(path: str, mode: str) -> TextIO:
+    if path.endswith('.xz'):
+        return lzma.open(path, mode + 't')
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't')
+    return open(path, mode)
+
+
+def steer(rng: random.Random, engine: ReferenceEngine) -> Optional[Direction]:
+    if engine.food is None:
+        return None
+
+    (x, y), (food_x, food_y) = engine.body[0], engine.food
+    towards = [direction for direction, distance in ((Direction.RIGHT, food_x - x), (Direction.LEFT, x - food_x),
+                                                     (Direction.DOWN, food_y - y), (Direction.UP, y - food_y))
+               if distance > 0 and {engine.direction, direction} not in OPPOSITE_DIRECTIONS]
+    if not towards:
+        towards = [direction for direction in Direction
+                   if direction != engine.direction and {engine.direction, direction} not in OPPOSITE_DIRECTIONS]
+    return rng.choice(towards)
+
+
+def record_case(rng: random.Random, index: int, seed: int, max_ticks: int, input_mode: str) -> Tuple[dict, Counter]:
+    start = [rng.randint(2, GRID_DIMENSION[0] - 3), rng.randint(2, GRID_DIMENSION[1] - 3),
+             rng.choice(list(Direction)).name]
+    foods = []
+    engine = INPUT_MODES[input_mode](start, foods, rng)
+    directions = list(Direction)
+    inputs = []
+    expected = []
+    outcomes = Counter()
+    for tick in range(max_ticks):
+        presses = []
+        if rng.random() < REGRESSION_STEER_RATE:
+            presses.append(steer(rng, engine))
+        if rng.random() < REGRESSION_INPUT_RATE:
+            presses.extend(rng.choice(directions) for _ in range(rng.choice([1, 1, 1, 2, 4])))
+        for direction in presses:
+            if direction is not None:
+                engine.set_next_direction(direction)
+                inputs.append([tick, direction.name])
+
+        state = engine.tick()
+        expected.append(state)
+        outcomes[state[0]] += 1
+        if state[0] in DEATH_NAMES:
+            break
+
+    case = {'case': index, 'seed': seed, 'input': input_mode, 'start': start, 'foods': foods, 'ticks': len(expected),
+            'inputs': inputs, 'expected': expected}
+    return case, outcomes
+
+
+def replay(engine_class: type, case: dict) -> Iterator[list]:
+    engine = engine_class(case['start'], case['foods'])
+    inputs = case['inputs']
+    next_input = 0
+    for tick in range(case['ticks']):
+        while next_input < len(inputs) and inputs[next_input][0] == tick:
+            engine.set_next_direction(Direction[inputs[next_input][1]])
+            next_input += 1
+        yield engine.tick()
+
+
+def generate_case(args: tuple) -> Tuple[str, Counter]:
+    index, seed, max_ticks, input_mode = args
+    rng = random.Random(seed)
+    for _ in range(REGRESSION_ATTEMPTS):
+        case, outcomes = record_case(rng, index, seed, max_ticks, input_mode)
+        if outcomes[TickOutcome.ATE.name]:
+            break
+    return json.dumps(case, separators=(',', ':')), outcomes
+
+
+def check_case(args: tuple) -> Optional[dict]:
+    engine_spec, line = args
+    case = json.loads(line)
+    try:
+        for tick, (actual, expected) in enumerate(zip(replay(load_engine(engine_spec), case), case['expected'])):
+            if actual != expected and json.loads(json.dumps(actual)) != expected:
+                return {'case': case['case'], 'seed': case['seed'], 'tick': tick, 'expected': expected,
+                        'actual': actual}
+    except Exception as e:
+        return {'case': case['case'], 'seed': case['seed'], 'tick': None, 'error': f'{type(e).__name__}: {e}'}
+    return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Generate a seeded regression corpus of the baseline game rules, or '
+                                                 'replay one against an engine and report the first divergent tick '
+                                                 'of each case.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    generate_parser = subparsers.add_parser('generate', help='record expected per-tick states')
+    generate_parser.add_argument('path', help='corpus file, .xz or .gz to compress')
+    generate_parser.add_argument('--cases', type=int, default=1000)
+    generate_parser.add_argument('--max-ticks', type=int, default=REGRESSION_MAX_TICKS)
+    generate_parser.add_argument('--seed', type=int, default=0)
+    generate_parser.add_argument('--input', choices=INPUT_MODES, default='queued',
+                                 help='queued buffers presses like InputBuffer, baseline applies the last press')
+
+    check_parser = subparsers.add_parser('check', help='replay a corpus against an engine')
+    check_parser.add_argument('path')
+    check_parser.add_argument('--engine', default='regression:SimulationEngine', help='engine class as module:Class')
+    check_parser.add_argument('--max-failures', type=int, default=10, help='failures to print in full')
+
+    for subparser in subparsers.choices.values():
+        subparser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    args = parser.parse_args()
+
+    with multiprocessing.Pool(args.workers) as pool:
+        if args.command == 'generate':
+            rng = random.Random(args.seed)
+            jobs = [(index, rng.getrandbits(32), args.max_ticks, args.input) for index in range(args.cases)]
+            outcomes = Counter()
+            with_pickups = 0
+            with open_corpus(args.path, 'w') as f:
+                for line, case_outcomes in pool.imap(generate_case, jobs, chunksize=8):
+                    f.write(line + '\n')
+                    outcomes += case_outcomes
+                    with_pickups += case_outcomes[TickOutcome.ATE.name] > 0
+            print(f'wrote {args.cases} {args.input} input cases to {args.path}')
+            print(f'{with_pickups}/{args.cases} cases with pickups, outcomes: '
+                  + ' '.join(f'{name}={outcomes[name]}' for name in sorted(outcomes)))
+            return
+
+        cases = 0
+        failures = []
+        with open_corpus(args.path, 'r') as f:
+            for result in pool.imap(check_case, ((args.engine, line) for line in f), chunksize=8):
+                cases += 1
+                if result is not None:
+                    failures.append(result)
+
+    for failure in failures[:args.max_failures]:
+        print(json.dumps(failure))
+    print(f'{cases} cases, {len(failures)} diverged')
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,403 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import ssl
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from itertools import islice
+from typing import Callable, Coroutine, Optional, Tuple
+from urllib.parse import urlsplit
+
+from config import (SCORE_SINK_URL, SCORE_SINK_QUEUE_PATH, SCORE_SINK_BATCH_SIZE, SCORE_SINK_BATCH_DELAY,
+                    SCORE_SINK_TIMEOUT, SCORE_SINK_RETRY_MIN, SCORE_SINK_RETRY_MAX)
+
+RETRYABLE_STATUSES = {408, 429}
+
+
+class ScoreSink:
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, url: Optional[str] = SCORE_SINK_URL, queue_path: str = SCORE_SINK_QUEUE_PATH):
+        self.url: Optional[str] = url
+        self.queue_path: str = queue_path
+        self._pending: deque[dict] = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._connection: Optional[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = None
+        self.sent: int = 0
+        self.rejected: int = 0
+        self.failures: int = 0
+        self.connections: int = 0
+
+    def is_running(self) -> bool:
+        return self._thread is not None
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def start(self) -> None:
+        if self.url is None or self.is_running():
+            return
+
+        self._pending.extend(self._load_queue())
+        self._loop = asyncio.new_event_loop()
+        self._wakeup = asyncio.Event()
+        self._stopped = asyncio.Event()
+        self._thread = threading.Thread(target=self._loop.run_until_complete, args=(self._run(),),
+                                        name='score-sink', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if not self.is_running():
+            return
+
+        self._loop.call_soon_threadsafe(self._stopped.set)
+        self._thread.join(SCORE_SINK_TIMEOUT * 2)
+        self._thread = None
+
+    def submit(self, result: dict) -> None:
+        if not self.is_running():
+            return
+
+        self._loop.call_soon_threadsafe(self._enqueue, result)
+
+    def _enqueue(self, result: dict) -> None:
+        os.makedirs(os.path.dirname(self.queue_path), exist_ok=True)
+        with open(self.queue_path, 'a') as f:
+            f.write(json.dumps(result) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self._pending.append(result)
+        self._wakeup.set()
+
+    def _load_queue(self) -> list[dict]:
+        results = []
+        try:
+            with open(self.queue_path, 'r') as f:
+                for line in f:
+                    try:
+                        results.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        pass
+        except FileNotFoundError:
+            pass
+        return results
+
+    def _save_queue(self) -> None:
+        temp_path = self.queue_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            for result in self._pending:
+                f.write(json.dumps(result) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.queue_path)
+
+    async def _sleep(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self._stopped.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self) -> None:
+        delay = SCORE_SINK_RETRY_MIN
+        while True:
+            if self._stopped.is_set() and (not self._pending or delay > SCORE_SINK_RETRY_MIN):
+                break
+
+            if not self._pending:
+                wakeup = asyncio.ensure_future(self._wakeup.wait())
+                stopped = asyncio.ensure_future(self._stopped.wait())
+                await asyncio.wait({wakeup, stopped}, return_when=asyncio.FIRST_COMPLETED)
+                wakeup.cancel()
+                stopped.cancel()
+                self._wakeup.clear()
+                continue
+
+            if len(self._pending) < SCORE_SINK_BATCH_SIZE:
+                await self._sleep(SCORE_SINK_BATCH_DELAY)
+
+            batch = list(islice(self._pending, SCORE_SINK_BATCH_SIZE))
+            try:
+                status = await asyncio.wait_for(self._post(batch), SCORE_SINK_TIMEOUT)
+            except (OSError, EOFError, ValueError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+                status = None
+                await self._close()
+
+            if status is not None and 200 <= status < 300:
+                self.sent += len(batch)
+            elif status is not None and 400 <= status < 500 and status not in RETRYABLE_STATUSES:
+                self.rejected += len(batch)
+            else:
+                self.failures += 1
+                await self._sleep(delay * random.uniform(1.0, 1.5))
+                delay = min(delay * 2, SCORE_SINK_RETRY_MAX)
+                continue
+
+            delay = SCORE_SINK_RETRY_MIN
+            for _ in batch:
+                self._pending.popleft()
+            self._save_queue()
+
+        await self._close()
+
+    async def _post(self, batch: list[dict]) -> int:
+        body = json.dumps({'results': batch}).encode()
+        reused = self._connection is not None
+        try:
+            return await self._request(body)
+        except (ConnectionError, EOFError):
+            await self._close()
+            if not reused:
+                raise
+            return await self._request(body)
+
+    async def _request(self, body: bytes) -> int:
+        url = urlsplit(self.url)
+        if self._connection is None:
+            secure = url.scheme == 'https'
+            self._connection = await asyncio.open_connection(url.hostname, url.port or (443 if secure else 80),
+                                                             ssl=ssl.create_default_context() if secure else None)
+            self.connections += 1
+
+        reader, writer = self._connection
+        writer.write((f'POST {url.path or "/"} HTTP/1.1\r\n'
+                      f'Host: {url.netloc}\r\n'
+                      f'Content-Type: application/json\r\n'
+                      f'Content-Length: {len(body)}\r\n'
+                      f'Connection: keep-alive\r\n\r\n').encode() + body)
+        await writer.drain()
+
+        version, status, headers = await read_head(reader)
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        else:
+            await reader.readexactly(int(headers.get('content-length', 0)))
+
+        if headers.get('connection', '').lower() == 'close' or version == 'HTTP/1.0':
+            await self._close()
+        return int(status)
+
+    async def _close(self) -> None:
+        if self._connection is None:
+            return
+
+        _, writer = self._connection
+        self._connection = None
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (OSError, EOFError):
+            pass
+
+
+async def read_head(reader: asyncio.StreamReader) -> Tuple[str, str, dict[str, str]]:
+    first_line = (await reader.readuntil(b'\r\n')).decode('latin-1').split(maxsplit=2)
+    if len(first_line) < 2:
+        raise ValueError(f'Malformed HTTP start line {first_line!r}')
+
+    headers = {}
+    while True:
+        line = await reader.readuntil(b'\r\n')
+        if line == b'\r\n':
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    return first_line[0], first_line[1], headers
+
+
+async def serve(host: str, port: int, fail_rate: float, header_padding: int = 0,
+                received: Optional[list[dict]] = None) -> None:
+    connections = 0
+    padding = f'X-Padding: {"x" * header_padding}\r\n' if header_padding > 0 else ''
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        nonlocal connections
+        connections += 1
+        connection = connections
+        requests = 0
+        try:
+            while True:
+                method, path, headers = await read_head(reader)
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                requests += 1
+
+                if random.random() < fail_rate:
+                    status = '503 Service Unavailable'
+                else:
+                    status = '200 OK'
+                    results = json.loads(body)['results']
+                    if received is not None:
+                        received.extend(results)
+                    print(f'connection {connection} request {requests}: {method} {path} {len(results)} results, '
+                          f'scores {[result.get("score", None) for result in results]}', flush=True)
+
+                writer.write(f'HTTP/1.1 {status}\r\nContent-Length: 0\r\n{padding}Connection: keep-alive\r\n\r\n'
+                             .encode())
+                await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    print(f'listening on http://{host}:{port}/scores', flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+class BackgroundServer:
+    def __init__(self, coroutine: Coroutine):
+        self._loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+        self._task: asyncio.Task = self._loop.create_task(coroutine)
+        self._thread: threading.Thread = threading.Thread(target=self._run, name='score-server', daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+    def stop(self) -> None:
+        self._loop.call_soon_threadsafe(self._task.cancel)
+        self._thread.join(SCORE_SINK_TIMEOUT)
+
+
+def free_port(host: str) -> int:
+    with socket.socket() as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+def wait_until(condition: Callable[[], bool], timeout: float) -> bool:
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+def selftest(count: int, timeout: float) -> list[str]:
+    host = '127.0.0.1'
+    port = free_port(host)
+    url = f'http://{host}:{port}/scores'
+    results = [{'game': uuid.uuid4().hex, 'player': f'player{i % 10}', 'score': i, 'level': 'classic'}
+               for i in range(count)]
+    errors = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        queue_path = os.path.join(directory, 'score_queue.jsonl')
+
+        sink = ScoreSink(url, queue_path)
+        sink.start()
+        for result in results:
+            sink.submit(result)
+        if not wait_until(lambda: sink.failures > 0, timeout):
+            errors.append('no delivery was attempted while the endpoint was down')
+        sink.stop()
+        queued = ScoreSink(url, queue_path)._load_queue()
+        if queued != results:
+            errors.append(f'{len(queued)} of {count} results were queued on disk while the endpoint was down')
+
+        server = BackgroundServer(serve(host, port, 0.0, header_padding=1 << 17))
+        sink = ScoreSink(url, queue_path)
+        sink.start()
+        if not wait_until(lambda: sink.failures > 0, timeout) or not sink._thread.is_alive():
+            errors.append('an oversized response header stopped the sink')
+        sink.stop()
+        server.stop()
+
+        received = []
+        server = BackgroundServer(serve(host, port, 0.0, received=received))
+        sink = ScoreSink(url, queue_path)
+        sink.start()
+        wait_until(lambda: sink.pending() == 0, timeout)
+        sink.stop()
+        server.stop()
+        if received != results:
+            errors.append(f'the endpoint received {len(received)} of {count} queued results after a restart')
+        if ScoreSink(url, queue_path)._load_queue():
+            errors.append('the queue file still holds results after they were delivered')
+
+    return errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Stand-in score endpoint, a client to send fake results to it and a '
+                                                 'self-test of the durable retry queue.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help='run a local stand-in score endpoint')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8765)
+    serve_parser.add_argument('--fail-rate', type=float, default=0.0, help='fraction of requests answered with 503')
+    serve_parser.add_argument('--header-padding', type=int, default=0, help='bytes of padding header in responses')
+
+    submit_parser = subparsers.add_parser('submit', help='submit fake results through the score sink')
+    submit_parser.add_argument('--url', default=SCORE_SINK_URL or 'http://127.0.0.1:8765/scores')
+    submit_parser.add_argument('--queue-path', default=SCORE_SINK_QUEUE_PATH)
+    submit_parser.add_argument('--count', type=int, default=50)
+    submit_parser.add_argument('--interval', type=float, default=0.02, help='seconds between results')
+    submit_parser.add_argument('--wait', type=float, default=10.0, help='seconds to wait for the queue to drain')
+
+    selftest_parser = subparsers.add_parser('selftest', help='check that queued results survive endpoint outages, '
+                                                             'malformed responses and a restart')
+    selftest_parser.add_argument('--count', type=int, default=40)
+    selftest_parser.add_argument('--timeout', type=float, default=10.0, help='seconds to wait for each step')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        try:
+            asyncio.run(serve(args.host, args.port, args.fail_rate, args.header_padding))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if args.command == 'selftest':
+        errors = selftest(args.count, args.timeout)
+        for error in errors:
+            print(f'FAILED: {error}')
+        print('selftest failed' if errors else 'selftest passed')
+        if errors:
+            raise SystemExit(1)
+        return
+
+    sink = ScoreSink(args.url, args.queue_path)
+    sink.start()
+    for i in range(args.count):
+        sink.submit({'game': uuid.uuid4().hex, 'player': f'player{i % 10}', 'score': random.randrange(5000),
+                     'level': 'classic', 'time': time.time()})
+        time.sleep(args.interval)
+
+    deadline = time.time() + args.wait
+    while sink.pending() > 0 and time.time() < deadline:
+        time.sleep(0.1)
+    sink.stop()
+    print(f'sent={sink.sent} rejected={sink.rejected} failures={sink.failures} connections={sink.connections} '
+          f'pending={sink.pending()}')
+
+
+if __name__ == '__main__':
+    main()
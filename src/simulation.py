@@ -0,0 +1,297 @@
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from enum import Enum, auto
+from typing import NamedTuple, Optional, Tuple
+
+import pygame
+
+from config import (SCORE_BASE, SCORE_EFFICIENCY_FACTOR, PICKUP_GROWTH_FACTOR, EASY_SPEED, MEDIUM_SPEED, HARD_SPEED,
+                    EXTREME_SPEED, FOOD_LIFETIME, POWER_UP_INTERVAL, POWER_UP_LIFETIME, POWER_UP_DURATION,
+                    SLOW_MO_FACTOR, SPEED_BOOST_FACTOR, FOOD_TYPE_MULTIPLIERS)
+from level import Level
+from metrics import LatencyHistogram
+from snake import Direction, Food, FoodField, FoodType, Snake
+from telemetry import TelemetryLogger
+from timer_wheel import Timer, TimerWheel
+
+
+class TickOutcome(Enum):
+    MOVED = auto()
+    ATE = auto()
+    POWERED_UP = auto()
+    HIT_SCREEN = auto()
+    HIT_WALL = auto()
+    HIT_SELF = auto()
+
+
+DEATHS = {
+    TickOutcome.HIT_SCREEN: 'screen',
+    TickOutcome.HIT_WALL: 'wall',
+    TickOutcome.HIT_SELF: 'self'
+}
+
+
+class PowerUp(Enum):
+    SLOW_MO = auto()
+    SPEED_BOOST = auto()
+    GHOST = auto()
+
+
+class Snapshot(NamedTuple):
+    tick_count: int
+    outcome: Optional[TickOutcome]
+    time_last_move: int
+    move_rate: int
+    positions: Tuple[Tuple[int, int], ...]
+    previous_head_position: Tuple[int, int]
+    previous_tail_position: Tuple[int, int]
+    foods: Tuple[Tuple[Tuple[int, int], FoodType], ...]
+    power_up_position: Optional[Tuple[int, int]]
+    score: int
+    pickup_count: int
+    power_up_count: int
+
+
+class Simulation:
+    def __init__(self, level: Level, input_latency: Optional[LatencyHistogram] = None):
+        self.game_id: str = uuid.uuid4().hex
+        self.level: Level = level
+        self.snake: Snake = Snake(input_latency, level)
+        self.snake.move_rate = EASY_SPEED
+        self.food: FoodField = FoodField()
+
+        self.timers: TimerWheel = TimerWheel()
+        self.outcomes: list[TickOutcome] = []
+        self._move_timer: Optional[Timer] = None
+        self._food_timer: Optional[Timer] = None
+        self._power_up_timer: Optional[Timer] = None
+
+        self.power_up: Optional[PowerUp] = None
+        self.power_up_food: Food = Food()
+        self.active_power_ups: dict[PowerUp, Timer] = {}
+        self.power_up_count: int = 0
+
+        self.time_last_pickup: int = 0
+        self.time_last_tick: int = 0
+        self.time_last_move: int = 0
+        self.frame_time: float = 0
+        self.tick_count: int = 0
+        self.pickup_count: int = 0
+        self.score: int = 0
+        self.outcome: Optional[TickOutcome] = None
+
+        self.telemetry: TelemetryLogger = TelemetryLogger.get_instance()
+
+        self._spawn_food()
+        self._reschedule_move()
+        self.timers.schedule(POWER_UP_INTERVAL, self._spawn_power_up, interval=POWER_UP_INTERVAL)
+
+    @property
+    def move_interval(self) -> int:
+        interval = self.snake.move_rate
+        if PowerUp.SLOW_MO in self.active_power_ups:
+            interval *= SLOW_MO_FACTOR
+        if PowerUp.SPEED_BOOST in self.active_power_ups:
+            interval *= SPEED_BOOST_FACTOR
+        return max(int(interval), 1)
+
+    def tick_progress(self) -> float:
+        return min((self.timers.now - self.time_last_tick) / self.move_interval, 1.0)
+
+    def time_until_move(self) -> int:
+        return max(self._move_timer.deadline - self.timers.now, 0) if self._move_timer is not None else 0
+
+    def pause(self) -> None:
+        self.timers.pause()
+
+    def resume(self) -> None:
+        self.timers.resume()
+
+    def advance(self, delta: int) -> list[TickOutcome]:
+        self.outcomes = []
+        self.timers.advance(delta)
+        return self.outcomes
+
+    def _reschedule_move(self) -> None:
+        interval = self.move_interval
+        if self._move_timer is not None and self._move_timer.interval == interval:
+            return
+
+        delay = interval
+        if self._move_timer is not None and self._move_timer.is_active():
+            delay = self._move_timer.deadline - self.timers.now
+        self.timers.cancel(self._move_timer)
+        self._move_timer = self.timers.schedule(delay, self._on_move, interval=interval)
+
+    def _on_move(self) -> None:
+        outcome = self.tick()
+        self.outcomes.append(outcome)
+        if outcome in DEATHS:
+            self.timers.pause()
+
+    def _spawn_food(self) -> None:
+        blocked = self.power_up_food.position if self.power_up is not None else None
+        positions = self.food.respawn(self.level, self.snake, blocked)
+        if positions:
+            self.telemetry.log('food_spawn', game=self.game_id, positions=positions)
+        self.timers.cancel(self._food_timer)
+        self._food_timer = self.timers.schedule(FOOD_LIFETIME, self._expire_food)
+
+    def _expire_food(self) -> None:
+        self.telemetry.log('food_expired', game=self.game_id, count=len(self.food))
+        self.food.clear()
+        self._spawn_food()
+
+    def _spawn_power_up(self) -> None:
+        if self.power_up is not None:
+            return
+
+        self.power_up_food.spawn(self.level, self.snake)
+        if self.food.at(self.power_up_food.position) is not None:
+            return
+
+        self.power_up = random.choice(list(PowerUp))
+        self._power_up_timer = self.timers.schedule(POWER_UP_LIFETIME, self._expire_power_up)
+
+    def _expire_power_up(self) -> None:
+        self.power_up = None
+
+    def _activate(self, power_up: PowerUp) -> None:
+        self.timers.cancel(self._power_up_timer)
+        self.power_up = None
+        self.power_up_count += 1
+        self.timers.cancel(self.active_power_ups.get(power_up, None))
+        self.active_power_ups[power_up] = self.timers.schedule(POWER_UP_DURATION, lambda: self._deactivate(power_up))
+        self.telemetry.log('power_up', game=self.game_id, power_up=power_up.name)
+        self._reschedule_move()
+
+    def _deactivate(self, power_up: PowerUp) -> None:
+        del self.active_power_ups[power_up]
+        self._reschedule_move()
+
+    def _collision(self) -> Optional[TickOutcome]:
+        if self.snake.collides_with_screen():
+            return TickOutcome.HIT_SCREEN
+        if self.snake.collides_with_wall():
+            return TickOutcome.HIT_WALL
+        if self.snake.collides_with_self() and PowerUp.GHOST not in self.active_power_ups:
+            return TickOutcome.HIT_SELF
+        return None
+
+    def tick(self) -> TickOutcome:
+        current_time = pygame.time.get_ticks()
+        self.tick_count += 1
+        self.time_last_tick = self.timers.now
+        self.snake.move()
+        self.telemetry.log('tick', game=self.game_id, interval=current_time - self.time_last_move,
+                           frame_time=self.frame_time, head=self.snake.head_position)
+        self.time_last_move = current_time
+
+        self.outcome = self._collision()
+        if self.outcome is not None:
+            self.telemetry.log('death', game=self.game_id, cause=DEATHS[self.outcome], score=self.score,
+                               pickups=self.pickup_count, length=len(self.snake), ticks=self.tick_count,
+                               head=self.snake.head_position)
+            return self.outcome
+
+        food_type = self.food.take(self.snake.head_position)
+        if food_type is not None:
+            self.snake.grow()
+            self.update_score(food_type)
+            self._spawn_food()
+            self.outcome = TickOutcome.ATE
+        elif self.power_up is not None and self.snake.collides_with_food(self.power_up_food):
+            self._activate(self.power_up)
+            self.outcome = TickOutcome.POWERED_UP
+        else:
+            self.outcome = TickOutcome.MOVED
+
+        return self.outcome
+
+    def update_score(self, food_type: FoodType = FoodType.NORMAL) -> None:
+        current_time = self.timers.now
+        time_since_last_pickup = current_time - self.time_last_pickup
+        self.time_last_pickup = current_time
+
+        self.pickup_count += 1
+        points = int((SCORE_BASE * (SCORE_EFFICIENCY_FACTOR / time_since_last_pickup)
+                      * (1 + self.pickup_count * PICKUP_GROWTH_FACTOR) * FOOD_TYPE_MULTIPLIERS[food_type.name]))
+        self.score += points
+        self.telemetry.log('pickup', game=self.game_id, time_since_last_pickup=time_since_last_pickup,
+                           pickup_count=self.pickup_count, food=food_type.name, points=points, score=self.score,
+                           head=self.snake.head_position)
+
+        move_rate = self.snake.move_rate
+
+        if self.score >= 500:
+            self.snake.move_rate = MEDIUM_SPEED
+        elif self.score >= 3000:
+            self.snake.move_rate = HARD_SPEED
+        elif self.score >= 10000:
+            self.snake.move_rate = EXTREME_SPEED
+
+        if self.snake.move_rate != move_rate:
+            self.telemetry.log('speed_change', game=self.game_id, move_rate=self.snake.move_rate, score=self.score)
+            self._reschedule_move()
+
+    def snapshot(self) -> Snapshot:
+        return Snapshot(tick_count=self.tick_count,
+                        outcome=self.outcome,
+                        time_last_move=self.time_last_move,
+                        move_rate=self.move_interval,
+                        positions=tuple(self.snake.positions()),
+                        previous_head_position=self.snake.previous_head_position,
+                        previous_tail_position=self.snake.previous_tail_position,
+                        foods=tuple(self.food.items()),
+                        power_up_position=self.power_up_food.position if self.power_up is not None else None,
+                        score=self.score,
+                        pickup_count=self.pickup_count,
+                        power_up_count=self.power_up_count)
+
+
+class SimulationThread(threading.Thread):
+    def __init__(self, simulation: Simulation):
+        super().__init__(name='simulation', daemon=True)
+        self.simulation: Simulation = simulation
+        self.inputs: deque[Tuple[Direction, int]] = deque()
+        self._snapshots: list[Snapshot] = [simulation.snapshot(), simulation.snapshot()]
+        self._front: int = 0
+        self._stopped: threading.Event = threading.Event()
+
+    def latest(self) -> Snapshot:
+        return self._snapshots[self._front]
+
+    def _publish(self) -> None:
+        back = 1 - self._front
+        self._snapshots[back] = self.simulation.snapshot()
+        self._front = back
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self.is_alive():
+            self.join()
+
+    def run(self) -> None:
+        snake = self.simulation.snake
+        last_time = time.perf_counter()
+        remainder = 0.0
+        while not self._stopped.is_set():
+            current_time = time.perf_counter()
+            elapsed = (current_time - last_time) * 1000 + remainder
+            last_time = current_time
+            remainder = elapsed - int(elapsed)
+
+            while self.inputs:
+                direction, time_pressed = self.inputs.popleft()
+                snake.set_next_direction(direction, time_pressed)
+
+            outcomes = self.simulation.advance(int(elapsed))
+            if outcomes:
+                self._publish()
+            if any(outcome in DEATHS for outcome in outcomes):
+                return
+
+            self._stopped.wait(self.simulation.time_until_move() / 1000)
@@ -1,13 +1,16 @@
 import random
-from abc import ABC, abstractmethod
+from array import array
+from collections import deque
 from enum import Enum, auto
 from itertools import product
-from typing import Tuple
+from typing import Iterator, Optional, Sequence, Tuple
 
 import pygame
 
-from config import (PLAYING_FIELD_WIDTH, PLAYING_FIELD_HEIGHT, TILE_SIZE, GRID_DIMENSION, ColorConfig,
-                    EASY_SPEED)
+from config import (TILE_SIZE, GRID_DIMENSION, ColorConfig, EASY_SPEED, INPUT_BUFFER_SIZE, INPUT_LATENCY_BUCKET_WIDTH,
+                    INPUT_LATENCY_BUCKET_COUNT, DEFAULT_LEVEL, FOOD_SPAWN_ATTEMPTS, FOOD_COUNT, FOOD_TYPE_WEIGHTS)
+from level import Level
+from metrics import LatencyHistogram
 
 
 class Direction(Enum):
@@ -17,137 +20,328 @@ class Direction(Enum):
     RIGHT = auto()
 
 
+OPPOSITE_DIRECTIONS = [{Direction.UP, Direction.DOWN}, {Direction.LEFT, Direction.RIGHT}]
+
+DIRECTION_OFFSETS = {
+    Direction.UP: (0, -1),
+    Direction.DOWN: (0, 1),
+    Direction.LEFT: (-1, 0),
+    Direction.RIGHT: (1, 0)
+}
+
+
+def cell_index(position: Tuple[int, int]) -> Optional[int]:
+    x, y = position
+    if 0 <= x < GRID_DIMENSION[0] and 0 <= y < GRID_DIMENSION[1]:
+        return y * GRID_DIMENSION[0] + x
+    return None
+
+
+class InputBuffer:
+    __slots__ = ('_inputs', '_size', 'latency', 'dropped')
+
+    def __init__(self, latency: LatencyHistogram, size: int = INPUT_BUFFER_SIZE):
+        self._inputs: deque[Tuple[Direction, int]] = deque()
+        self._size: int = size
+        self.latency: LatencyHistogram = latency
+        self.dropped: int = 0
+
+    def last(self) -> Optional[Direction]:
+        return self._inputs[-1][0] if self._inputs else None
+
+    def push(self, direction: Direction, time_pressed: Optional[int] = None) -> None:
+        if len(self._inputs) >= self._size:
+            self.dropped += 1
+            return
+        self._inputs.append((direction, pygame.time.get_ticks() if time_pressed is None else time_pressed))
+
+    def pop(self) -> Optional[Direction]:
+        if not self._inputs:
+            return None
+        direction, time_pressed = self._inputs.popleft()
+        self.latency.record(pygame.time.get_ticks() - time_pressed)
+        return direction
+
+    def clear(self) -> None:
+        self._inputs.clear()
+
+
 class Food:
+    __slots__ = ('position',)
+
     def __init__(self):
-        self.rect: pygame.Rect = pygame.Rect(0, 0, TILE_SIZE, TILE_SIZE)
-        self.color_config: ColorConfig = ColorConfig.get_instance()
-        self.grid_positions = set((x, y) for x, y in product(range(GRID_DIMENSION[0]), range(GRID_DIMENSION[1])))
+        self.position: Tuple[int, int] = (0, 0)
 
-    def spawn(self, invalid_positions: set[Tuple[int, int]]) -> None:
-        x, y = random.choice(list(self.grid_positions - invalid_positions))
-        self.rect.x = x * TILE_SIZE
-        self.rect.y = y * TILE_SIZE
+    @staticmethod
+    def _is_free(position: Tuple[int, int], level: Level, snake: 'Snake') -> bool:
+        return not level.is_wall(position) and not snake.occupies(position)
+
+    def spawn(self, level: Level, snake: 'Snake') -> None:
+        for _ in range(FOOD_SPAWN_ATTEMPTS):
+            position = random.randrange(GRID_DIMENSION[0]), random.randrange(GRID_DIMENSION[1])
+            if self._is_free(position, level, snake):
+                break
+        else:
+            position = random.choice([position for position in product(range(GRID_DIMENSION[0]),
+                                                                       range(GRID_DIMENSION[1]))
+                                      if self._is_free(position, level, snake)])
+
+        self.position = position
 
     def draw(self, screen: pygame.Surface) -> None:
-        pygame.draw.rect(screen, self.color_config.food, self.rect)
+        draw_food(screen, self.position)
 
 
-class SnakeBody(ABC):
-    color_config: ColorConfig = ColorConfig.get_instance()
+class FoodType(Enum):
+    NORMAL = auto()
+    BONUS = auto()
+    GOLDEN = auto()
 
-    def __init__(self, spawn_pos: Tuple[int, int]):
-        x, y = spawn_pos
-        self.rect: pygame.Rect = pygame.Rect(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE)
-        self.position: Tuple[int, int] = spawn_pos
 
-    @abstractmethod
-    def draw(self, screen: pygame.Surface) -> None:
-        pass
+FOOD_TYPES = list(FoodType)
 
 
-class Head(SnakeBody):
-    def __init__(self):
-        super().__init__(spawn_pos=(random.randint(2, GRID_DIMENSION[0] - 3), random.randint(2, GRID_DIMENSION[1] - 3)))
-        self.next_dir: Direction = random.choice([direction for direction in Direction])
-        self.last_dir: Direction = self.next_dir
+class FoodField:
+    __slots__ = ('count', '_cells')
 
-    def move(self) -> None:
-        x, y = self.position
-        match self.next_dir:
-            case Direction.UP:
-                self.rect.y -= TILE_SIZE
-                self.position = (x, y - 1)
-            case Direction.DOWN:
-                self.rect.y += TILE_SIZE
-                self.position = (x, y + 1)
-            case Direction.LEFT:
-                self.rect.x -= TILE_SIZE
-                self.position = (x - 1, y)
-            case Direction.RIGHT:
-                self.rect.x += TILE_SIZE
-                self.position = (x + 1, y)
+    def __init__(self, count: int = FOOD_COUNT):
+        self.count: int = count
+        self._cells: dict[int, FoodType] = {}
 
-    def collides_with_screen(self) -> bool:
-        return (self.rect.left < 0 and self.next_dir == Direction.LEFT
-                or self.rect.right > PLAYING_FIELD_WIDTH and self.next_dir == Direction.RIGHT
-                or self.rect.top < 0 and self.next_dir == Direction.UP
-                or self.rect.bottom > PLAYING_FIELD_HEIGHT and self.next_dir == Direction.DOWN)
+    def __len__(self) -> int:
+        return len(self._cells)
 
-    def collides_with_tail(self, tail: SnakeBody) -> bool:
-        return self.rect.colliderect(tail.rect)
+    def at(self, position: Tuple[int, int]) -> Optional[FoodType]:
+        cell = cell_index(position)
+        return self._cells.get(cell, None) if cell is not None else None
 
-    def collides_with_food(self, food: Food) -> bool:
-        return self.rect.colliderect(food.rect)
+    def take(self, position: Tuple[int, int]) -> Optional[FoodType]:
+        cell = cell_index(position)
+        return self._cells.pop(cell, None) if cell is not None else None
 
-    def draw(self, screen: pygame.Surface) -> None:
-        pygame.draw.rect(surface=screen, color=self.color_config.snake_head, rect=self.rect)
+    def items(self) -> Iterator[Tuple[Tuple[int, int], FoodType]]:
+        for cell, food_type in self._cells.items():
+            y, x = divmod(cell, GRID_DIMENSION[0])
+            yield (x, y), food_type
+
+    def clear(self) -> None:
+        self._cells.clear()
+
+    def _is_free(self, cell: int, level: Level, snake: 'Snake', blocked_cell: Optional[int]) -> bool:
+        return (not level.walls[cell] and not snake.occupies_cell(cell) and cell not in self._cells
+                and cell != blocked_cell)
+
+    def respawn(self, level: Level, snake: 'Snake', blocked: Optional[Tuple[int, int]] = None) -> list[Tuple[int, int]]:
+        missing = self.count - len(self._cells)
+        if missing <= 0:
+            return []
+
+        blocked_cell = cell_index(blocked) if blocked is not None else None
+        cell_count = GRID_DIMENSION[0] * GRID_DIMENSION[1]
+        food_types = random.choices(FOOD_TYPES, weights=[FOOD_TYPE_WEIGHTS[food_type.name]
+                                                         for food_type in FOOD_TYPES], k=missing)
+        placed = []
+        for _ in range(FOOD_SPAWN_ATTEMPTS):
+            placed_before = len(placed)
+            for cell in random.sample(range(cell_count), min(2 * len(food_types), cell_count)):
+                if self._is_free(cell, level, snake, blocked_cell):
+                    self._cells[cell] = food_types.pop()
+                    placed.append(cell)
+                    if not food_types:
+                        break
+            if not food_types or len(placed) == placed_before:
+                break
 
+        if food_types:
+            free_cells = [cell for cell in range(cell_count) if self._is_free(cell, level, snake, blocked_cell)]
+            for cell in random.sample(free_cells, min(len(food_types), len(free_cells))):
+                self._cells[cell] = food_types.pop()
+                placed.append(cell)
 
-class Tail(SnakeBody):
-    def __init__(self, spawn_pos: Tuple[int, int]):
-        super().__init__(spawn_pos=spawn_pos)
+        return [(cell % GRID_DIMENSION[0], cell // GRID_DIMENSION[0]) for cell in placed]
 
     def draw(self, screen: pygame.Surface) -> None:
-        pygame.draw.rect(surface=screen, color=self.color_config.snake_tail, rect=self.rect.inflate((-2, -2)))
+        for position, food_type in self.items():
+            draw_food(screen, position, food_type)
 
 
 class Snake:
-    def __init__(self):
-        self.head: Head = Head()
-        x, y = self.head.rect.x / TILE_SIZE, self.head.rect.y / TILE_SIZE
-        match self.head.next_dir:
-            case Direction.UP:
-                x_fac, y_fac = 0, 1
-            case Direction.DOWN:
-                x_fac, y_fac = 0, -1
-            case Direction.LEFT:
-                x_fac, y_fac = 1, 0
-            case Direction.RIGHT:
-                x_fac, y_fac = -1, 0
-            case _:
-                x_fac, y_fac = 0, 0
-
-        self.body: list[SnakeBody] = [self.head,
-                                      Tail(spawn_pos=(x + x_fac, y + y_fac)),
-                                      Tail(spawn_pos=(x + 2 * x_fac, y + 2 * y_fac))]
+    __slots__ = ('_xs', '_ys', '_occupancy', '_head_index', '_length', 'next_dir', 'last_dir', 'grow_position',
+                 'previous_head_position', 'previous_tail_position', 'move_rate', 'input_buffer', 'level')
+
+    def __init__(self, input_latency: Optional[LatencyHistogram] = None, level: Optional[Level] = None):
+        capacity = GRID_DIMENSION[0] * GRID_DIMENSION[1] + 1
+        self._xs: array = array('h', bytes(2 * capacity))
+        self._ys: array = array('h', bytes(2 * capacity))
+        self._occupancy: bytearray = bytearray(GRID_DIMENSION[0] * GRID_DIMENSION[1])
+        self._head_index: int = 0
+        self._length: int = 0
+        self.level: Level = level if level is not None else Level.load(DEFAULT_LEVEL)
+
+        spawn_positions, self.next_dir = self._find_spawn()
+        self.last_dir: Direction = self.next_dir
+        for position in spawn_positions:
+            self._append(position)
+
         self.grow_position: Tuple[int, int] = (0, 0)
+        self.previous_head_position: Tuple[int, int] = self.head_position
+        self.previous_tail_position: Tuple[int, int] = self.tail_position
         self.move_rate = EASY_SPEED
 
-    def set_next_direction(self, next_dir: Direction) -> None:
-        if {self.head.last_dir, next_dir} in [{Direction.UP, Direction.DOWN}, {Direction.LEFT, Direction.RIGHT}]:
+        if input_latency is None:
+            input_latency = LatencyHistogram(INPUT_LATENCY_BUCKET_WIDTH, INPUT_LATENCY_BUCKET_COUNT)
+        self.input_buffer: InputBuffer = InputBuffer(input_latency)
+
+    def _find_spawn(self) -> Tuple[list[Tuple[int, int]], Direction]:
+        for _ in range(100):
+            x, y = random.choice(self.level.spawn_cells)
+            direction = random.choice([direction for direction in Direction])
+            x_fac, y_fac = DIRECTION_OFFSETS[direction]
+            positions = [self.level.wrap_position((x - i * x_fac, y - i * y_fac)) for i in range(-1, 3)]
+            if all(cell_index(position) is not None and not self.level.is_wall(position) for position in positions):
+                return positions[1:], direction
+
+        raise ValueError(f'Level {self.level.name!r} has no room to spawn the snake')
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _index(self, segment: int) -> int:
+        return (self._head_index + segment) % len(self._xs)
+
+    def _position(self, segment: int) -> Tuple[int, int]:
+        i = self._index(segment)
+        return self._xs[i], self._ys[i]
+
+    def _occupy(self, position: Tuple[int, int], amount: int) -> None:
+        cell = cell_index(position)
+        if cell is not None:
+            self._occupancy[cell] += amount
+
+    def _append(self, position: Tuple[int, int]) -> None:
+        if self._length == len(self._xs):
+            raise ValueError(f'Snake cannot grow past {len(self._xs)} segments')
+        i = self._index(self._length)
+        self._xs[i], self._ys[i] = position
+        self._length += 1
+        self._occupy(position, 1)
+
+    @property
+    def head_position(self) -> Tuple[int, int]:
+        return self._position(0)
+
+    @property
+    def tail_position(self) -> Tuple[int, int]:
+        return self._position(self._length - 1)
+
+    def positions(self) -> Iterator[Tuple[int, int]]:
+        for segment in range(self._length):
+            yield self._position(segment)
+
+    def occupies(self, position: Tuple[int, int]) -> bool:
+        cell = cell_index(position)
+        return cell is not None and self._occupancy[cell] > 0
+
+    def occupies_cell(self, cell: int) -> bool:
+        return self._occupancy[cell] > 0
+
+    def set_next_direction(self, next_dir: Direction, time_pressed: Optional[int] = None) -> None:
+        queued_dir = self.input_buffer.last()
+        previous_dir = queued_dir if queued_dir is not None else self.last_dir
+        if next_dir == previous_dir or {previous_dir, next_dir} in OPPOSITE_DIRECTIONS:
             return
-        self.head.next_dir = next_dir
+        self.input_buffer.push(next_dir, time_pressed)
+
+    def _apply_next_direction(self) -> None:
+        next_dir = self.input_buffer.pop()
+        if next_dir is not None:
+            self.next_dir = next_dir
 
     def _remember_grow_position(self) -> None:
-        self.grow_position = self.body[-1].position
+        self.grow_position = self.tail_position
 
     def _remember_last_direction(self) -> None:
-        self.head.last_dir = self.head.next_dir
+        self.last_dir = self.next_dir
+
+    def _remember_previous_positions(self) -> None:
+        self.previous_head_position = self.head_position
+        self.previous_tail_position = self.tail_position
 
     def move(self) -> None:
+        self._apply_next_direction()
         self._remember_grow_position()
         self._remember_last_direction()
+        self._remember_previous_positions()
 
-        for i in range(len(self.body) - 1, 0, -1):
-            self.body[i].rect = self.body[i - 1].rect.copy()
-            self.body[i].position = self.body[i - 1].position
-        self.head.move()
+        x, y = self.head_position
+        x_fac, y_fac = DIRECTION_OFFSETS[self.next_dir]
+        head_position = self.level.wrap_position((x + x_fac, y + y_fac))
+        self._occupy(self.grow_position, -1)
+        self._head_index = self._index(-1)
+        self._xs[self._head_index], self._ys[self._head_index] = head_position
+        self._occupy(head_position, 1)
 
     def collides_with_screen(self) -> bool:
-        return self.head.collides_with_screen()
+        return cell_index(self.head_position) is None
+
+    def collides_with_wall(self) -> bool:
+        return self.level.is_wall(self.head_position)
 
     def collides_with_self(self) -> bool:
-        return any(self.head.collides_with_tail(tail) for tail in self.body[1:])
+        cell = cell_index(self.head_position)
+        return cell is not None and self._occupancy[cell] > 1
 
     def collides_with_food(self, food: Food) -> bool:
-        return self.head.collides_with_food(food)
+        return self.head_position == food.position
 
     def get_positions(self) -> set[Tuple[int, int]]:
-        return set(body_part.position for body_part in self.body)
+        return set(self.positions())
 
     def grow(self) -> None:
-        self.body.append(Tail(spawn_pos=self.grow_position))
-
-    def draw(self, screen: pygame.Surface) -> None:
-        for snake_body in self.body:
-            snake_body.draw(screen)
+        self._append(self.grow_position)
+
+    def draw(self, screen: pygame.Surface, alpha: float = 1.0) -> None:
+        draw_snake(screen, list(self.positions()), self.previous_head_position, self.previous_tail_position, alpha)
+
+
+def draw_food(screen: pygame.Surface, position: Tuple[int, int], food_type: FoodType = FoodType.NORMAL) -> None:
+    x, y = position
+    rect = pygame.Rect(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+    color_config = ColorConfig.get_instance()
+    match food_type:
+        case FoodType.BONUS:
+            color = color_config.bonus_food
+        case FoodType.GOLDEN:
+            color = color_config.golden_food
+        case _:
+            color = color_config.food
+    pygame.draw.rect(screen, color, rect)
+
+
+def draw_power_up(screen: pygame.Surface, position: Tuple[int, int]) -> None:
+    x, y = position
+    center = (x * TILE_SIZE + TILE_SIZE // 2, y * TILE_SIZE + TILE_SIZE // 2)
+    pygame.draw.circle(screen, ColorConfig.get_instance().power_up, center, TILE_SIZE // 2)
+
+
+def _interpolated_rect(previous_position: Tuple[int, int], position: Tuple[int, int], alpha: float) -> pygame.Rect:
+    x, y = position
+    previous_x, previous_y = previous_position
+    if abs(x - previous_x) > 1 or abs(y - previous_y) > 1:
+        previous_x, previous_y = x, y
+    return pygame.Rect(round((previous_x + (x - previous_x) * alpha) * TILE_SIZE),
+                       round((previous_y + (y - previous_y) * alpha) * TILE_SIZE), TILE_SIZE, TILE_SIZE)
+
+
+def draw_snake(screen: pygame.Surface, positions: Sequence[Tuple[int, int]], previous_head_position: Tuple[int, int],
+               previous_tail_position: Tuple[int, int], alpha: float = 1.0) -> None:
+    color_config = ColorConfig.get_instance()
+    rect = pygame.Rect(0, 0, TILE_SIZE, TILE_SIZE)
+    for x, y in positions[1:-1]:
+        rect.update(x * TILE_SIZE + 1, y * TILE_SIZE + 1, TILE_SIZE - 2, TILE_SIZE - 2)
+        pygame.draw.rect(surface=screen, color=color_config.snake_tail, rect=rect)
+
+    tail_rect = _interpolated_rect(previous_tail_position, positions[-1], alpha)
+    pygame.draw.rect(surface=screen, color=color_config.snake_tail, rect=tail_rect.inflate((-2, -2)))
+    head_rect = _interpolated_rect(previous_head_position, positions[0], alpha)
+    pygame.draw.rect(surface=screen, color=color_config.snake_head, rect=head_rect)
@@ -0,0 +1,139 @@
+import argparse
+import random
+import time
+from typing import Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from config import GRID_DIMENSION, DEFAULT_LEVEL, ENV_DEATH_REWARD, ENV_MAX_STEPS
+from level import Level
+from simulation import DEATHS, Simulation, TickOutcome
+from snake import Direction
+
+HEAD, BODY, FOOD, WALL = range(4)
+DIRECTION_CHANNELS = {
+    Direction.UP: 4,
+    Direction.DOWN: 5,
+    Direction.LEFT: 6,
+    Direction.RIGHT: 7
+}
+CHANNELS = 8
+
+ACTIONS = [Direction.UP, Direction.DOWN, Direction.LEFT, Direction.RIGHT]
+
+
+class SnakeEnv:
+    def __init__(self, level_name: str = DEFAULT_LEVEL, seed: Optional[int] = None, max_steps: int = ENV_MAX_STEPS):
+        if np is None:
+            raise ImportError('numpy is required for SnakeEnv, install the analytics extra')
+
+        self.level: Level = Level.load(level_name)
+        self.max_steps: int = max_steps
+        self.random: random.Random = random.Random(seed)
+        width, height = GRID_DIMENSION
+        self.observation: np.ndarray = np.zeros((CHANNELS, height, width), dtype=np.uint8)
+        self._walls: np.ndarray = np.frombuffer(self.level.walls, dtype=np.uint8).reshape(height, width)
+        self.simulation: Optional[Simulation] = None
+        self.steps: int = 0
+        self.direction: Optional[Direction] = None
+
+    def log(self, event: str, **fields) -> None:
+        match event:
+            case 'food_spawn':
+                for x, y in fields['positions']:
+                    self.observation[FOOD, y, x] = 1
+            case 'food_expired':
+                self.observation[FOOD] = 0
+
+    def _set_direction(self, direction: Direction) -> None:
+        if direction != self.direction:
+            if self.direction is not None:
+                self.observation[DIRECTION_CHANNELS[self.direction]] = 0
+            self.observation[DIRECTION_CHANNELS[direction]] = 1
+            self.direction = direction
+
+    def reset(self, seed: Optional[int] = None) -> Tuple['np.ndarray', dict]:
+        if seed is not None:
+            self.random.seed(seed)
+        random.seed(self.random.getrandbits(64))
+
+        self.observation[...] = 0
+        self.observation[WALL] = self._walls
+        self.direction = None
+        self.steps = 0
+
+        self.simulation = Simulation(self.level)
+        self.simulation.telemetry = self
+        for (x, y), _ in self.simulation.food.items():
+            self.observation[FOOD, y, x] = 1
+        for x, y in self.simulation.snake.positions():
+            self.observation[BODY, y, x] = 1
+        x, y = self.simulation.snake.head_position
+        self.observation[BODY, y, x] = 0
+        self.observation[HEAD, y, x] = 1
+        self._set_direction(self.simulation.snake.next_dir)
+
+        return self.observation, {'score': 0}
+
+    def step(self, action: int) -> Tuple['np.ndarray', float, bool, bool, dict]:
+        simulation = self.simulation
+        snake = simulation.snake
+        observation = self.observation
+        score = simulation.score
+        if simulation.outcome in DEATHS:
+            raise RuntimeError('step() called on a terminated episode, call reset() first')
+
+        snake.set_next_direction(ACTIONS[action])
+        head_x, head_y = snake.head_position
+        outcomes = []
+        while not outcomes:
+            outcomes = simulation.advance(simulation.time_until_move())
+        assert len(outcomes) == 1, f'expected one move per step, got {outcomes}'
+        outcome = outcomes[0]
+        self.steps += 1
+
+        observation[HEAD, head_y, head_x] = 0
+        observation[BODY, head_y, head_x] = 1
+        if outcome != TickOutcome.ATE:
+            tail = snake.grow_position
+            observation[BODY, tail[1], tail[0]] = snake.occupies(tail) and tail != snake.head_position
+        self._set_direction(snake.last_dir)
+
+        terminated = outcome in DEATHS
+        if not terminated:
+            x, y = snake.head_position
+            observation[HEAD, y, x] = 1
+            observation[BODY, y, x] = 0
+            observation[FOOD, y, x] = 0
+
+        reward = simulation.score - score + (ENV_DEATH_REWARD if terminated else 0)
+        return observation, reward, terminated, self.steps >= self.max_steps, {'score': simulation.score}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measure SnakeEnv step throughput with a random policy.')
+    parser.add_argument('--level', default=DEFAULT_LEVEL)
+    parser.add_argument('--steps', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    env = SnakeEnv(args.level, args.seed)
+    rng = random.Random(args.seed)
+    env.reset()
+    episodes = 0
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        _, _, terminated, truncated, _ = env.step(rng.randrange(len(ACTIONS)))
+        if terminated or truncated:
+            episodes += 1
+            env.reset()
+    elapsed = time.perf_counter() - start
+    print(f'{args.steps} steps, {episodes} episodes in {elapsed:.2f}s: {args.steps / elapsed:.0f} steps/s, '
+          f'{elapsed / args.steps * 1e6:.1f}us/step')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Optional
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+import pygame_gui
+
+from config import FPS
+from game import Game
+from game_states import GameStates
+from metrics import LatencyHistogram
+from user_interface import SubUIs
+
+FRAME_DELTA = 1000 / FPS
+DIRECTION_KEYS = [pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d]
+
+
+def rss_bytes() -> int:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class SoakTest:
+    def __init__(self, game: Game, max_ticks: int, seed: Optional[int]):
+        self.game: Game = game
+        self.max_ticks: int = max_ticks
+        self.random: random.Random = random.Random(seed)
+        self.frame_times: LatencyHistogram = LatencyHistogram(1, 100)
+        self.frames: int = 0
+        self.transitions: int = 0
+
+        main_menu_ui = game.states[GameStates.MAIN_MENU].user_interface
+        self.main_menu_ui = main_menu_ui
+        self.starting_ui = main_menu_ui._sub_uis[SubUIs.MM_STARTING]
+        self.highscore_ui = main_menu_ui._sub_uis[SubUIs.MM_HIGHSCORE]
+        self.pause_ui = game.states[GameStates.PAUSE].user_interface
+        self.game_over_ui = game.states[GameStates.GAME_OVER].user_interface
+
+    def _step(self, *events: pygame.Event, delta: float = FRAME_DELTA) -> None:
+        for event in events:
+            pygame.event.post(event)
+
+        state = self.game.state
+        start = time.perf_counter()
+        self.game.step(delta)
+        self.frame_times.record(round((time.perf_counter() - start) * 1000))
+        self.frames += 1
+        if self.game.state is not state:
+            self.transitions += 1
+
+    def _press(self, element: pygame_gui.core.UIElement) -> None:
+        self._step(pygame.event.Event(pygame_gui.UI_BUTTON_PRESSED, {'ui_element': element}))
+
+    def _key(self, key: int) -> None:
+        self._step(pygame.event.Event(pygame.KEYDOWN, {'key': key}))
+
+    def _in_state(self, state: GameStates) -> bool:
+        return self.game.state is self.game.states[state]
+
+    def run_session(self, session: int) -> None:
+        self._press(self.main_menu_ui.start_button)
+        self.starting_ui.name_input.set_text(f'soak{session % 50}')
+        self._key(pygame.K_RETURN)
+
+        pause_tick = self.random.randint(1, 20)
+        for tick in range(self.max_ticks):
+            if not self._in_state(GameStates.PLAYING):
+                break
+
+            if tick == pause_tick:
+                self._key(pygame.K_ESCAPE)
+                self._press(self.pause_ui.resume_button)
+
+            events = []
+            if self.random.random() < 0.3:
+                events.append(pygame.event.Event(pygame.KEYDOWN, {'key': self.random.choice(DIRECTION_KEYS)}))
+            self._step(*events, delta=self.game.state.simulation.time_until_move())
+
+        if self._in_state(GameStates.PLAYING):
+            self._key(pygame.K_ESCAPE)
+            self._press(self.pause_ui.menu_button)
+        else:
+            self._press(self.game_over_ui.menu_button)
+
+        self._press(self.main_menu_ui.highscore_button)
+        self._press(self.highscore_ui.back_button)
+
+
+def print_sample(soak_test: SoakTest, session: int, started: float, baseline: Optional[tracemalloc.Snapshot],
+                 top: int) -> None:
+    ui_elements = len(soak_test.game.ui_manager.get_sprite_group().sprites())
+    print(f'[{time.time() - started:8.0f}s] sessions={session} transitions={soak_test.transitions} '
+          f'frames={soak_test.frames} rss={rss_bytes() / 2 ** 20:.1f}MiB ui_elements={ui_elements} '
+          f'frame_time: {soak_test.frame_times}', flush=True)
+    soak_test.frame_times.reset()
+
+    if baseline is not None:
+        snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        for stat in snapshot.compare_to(baseline, 'lineno')[:top]:
+            print(f'    {stat}', flush=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Run the full game headless through scripted sessions and track '
+                                                 'memory growth.')
+    parser.add_argument('--hours', type=float, default=None, help='stop after this many hours')
+    parser.add_argument('--sessions', type=int, default=None, help='stop after this many sessions')
+    parser.add_argument('--sample-every', type=int, default=100, help='sessions between samples')
+    parser.add_argument('--max-ticks', type=int, default=2000, help='ticks before a session is abandoned')
+    parser.add_argument('--top', type=int, default=5, help='number of top allocators to print per sample')
+    parser.add_argument('--tracemalloc', action=argparse.BooleanOptionalAction, default=True,
+                        help='sample top allocators with tracemalloc')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.hours is None and args.sessions is None:
+        args.sessions = 1000
+
+    work_dir = tempfile.mkdtemp(prefix='snake_soak_')
+    os.makedirs(os.path.join(work_dir, 'save_files'))
+    with open(os.path.join(work_dir, 'save_files', 'highscore.json'), 'w') as f:
+        f.write('{}')
+    sys.path[:] = [os.path.abspath(path) for path in sys.path]
+    os.chdir(work_dir)
+
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    game = Game()
+    soak_test = SoakTest(game, args.max_ticks, args.seed)
+    baseline = tracemalloc.take_snapshot() if args.tracemalloc else None
+    started = time.time()
+    deadline = started + args.hours * 3600 if args.hours is not None else None
+
+    session = 0
+    try:
+        print_sample(soak_test, session, started, None, args.top)
+        while ((args.sessions is None or session < args.sessions)
+               and (deadline is None or time.time() < deadline)):
+            soak_test.run_session(session)
+            session += 1
+            if session % args.sample_every == 0:
+                print_sample(soak_test, session, started, baseline, args.top)
+    finally:
+        game.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+import json
+import os
+import queue
+import threading
+import time
+from typing import Optional
+
+from config import (TELEMETRY_ENABLED, TELEMETRY_PATH, TELEMETRY_BUFFER_SIZE, TELEMETRY_BATCH_SIZE,
+                    TELEMETRY_FLUSH_INTERVAL, TELEMETRY_MAX_FILE_SIZE, TELEMETRY_BACKUP_COUNT)
+
+
+class TelemetryLogger:
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, path: str = TELEMETRY_PATH, buffer_size: int = TELEMETRY_BUFFER_SIZE):
+        self.path: str = path
+        self._buffer: queue.Queue[Optional[dict]] = queue.Queue(maxsize=buffer_size)
+        self._thread: Optional[threading.Thread] = None
+        self.dropped: int = 0
+
+    def is_running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        if not TELEMETRY_ENABLED or self.is_running():
+            return
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name='telemetry', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if not self.is_running():
+            return
+
+        self._buffer.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def log(self, event: str, **fields) -> None:
+        if not self.is_running():
+            return
+
+        try:
+            self._buffer.put_nowait({'time': time.time(), 'event': event, **fields})
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        running = True
+        while running:
+            batch = []
+            try:
+                batch.append(self._buffer.get(timeout=TELEMETRY_FLUSH_INTERVAL))
+                while len(batch) < TELEMETRY_BATCH_SIZE:
+                    batch.append(self._buffer.get_nowait())
+            except queue.Empty:
+                pass
+
+            if None in batch:
+                batch = batch[:batch.index(None)]
+                running = False
+
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: list[dict]) -> None:
+        if os.path.exists(self.path) and os.path.getsize(self.path) >= TELEMETRY_MAX_FILE_SIZE:
+            self._rotate()
+
+        with open(self.path, 'a') as f:
+            f.write(''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in batch))
+
+    def _rotate(self) -> None:
+        for i in range(TELEMETRY_BACKUP_COUNT - 1, 0, -1):
+            source = f'{self.path}.{i}'
+            if os.path.exists(source):
+                os.replace(source, f'{self.path}.{i + 1}')
+        os.replace(self.path, f'{self.path}.1')
@@ -0,0 +1,135 @@
+import argparse
+import glob
+import gzip
+import json
+from collections import Counter
+from typing import Iterator, TextIO
+
+from config import (SCORE_BASE, SCORE_EFFICIENCY_FACTOR, PICKUP_GROWTH_FACTOR, TELEMETRY_PATH, FOOD_TYPE_MULTIPLIERS,
+                    INPUT_LATENCY_BUCKET_WIDTH, INPUT_LATENCY_BUCKET_COUNT)
+from metrics import LatencyHistogram
+
+
+class TelemetryReport:
+    def __init__(self, score_base: float, efficiency_factor: float):
+        self.score_base: float = score_base
+        self.efficiency_factor: float = efficiency_factor
+
+        self.events: Counter[str] = Counter()
+        self.death_causes: Counter[str] = Counter()
+        self.move_rates: Counter[int] = Counter()
+        self.pickup_intervals: LatencyHistogram = LatencyHistogram(250, 80)
+        self.tick_intervals: LatencyHistogram = LatencyHistogram(5, 60)
+        self.frame_times: LatencyHistogram = LatencyHistogram(2, 50)
+        self.final_scores: LatencyHistogram = LatencyHistogram(500, 100, unit='')
+        self.input_latency: LatencyHistogram = LatencyHistogram(INPUT_LATENCY_BUCKET_WIDTH, INPUT_LATENCY_BUCKET_COUNT)
+        self.dropped_inputs: int = 0
+        self.coalesced_sounds: int = 0
+        self.audio_buffer_latencies: Counter[float] = Counter()
+        self.points: int = 0
+        self.tuned_points: int = 0
+        self.malformed: int = 0
+
+    def add(self, record: dict) -> None:
+        event = record.get('event', None)
+        match event:
+            case 'tick':
+                interval, frame_time = round(record['interval']), round(record['frame_time'])
+                self.tick_intervals.record(interval)
+                self.frame_times.record(frame_time)
+            case 'pickup':
+                interval, points = round(record['time_since_last_pickup']), round(record['points'])
+                tuned_points = int(self.score_base * (self.efficiency_factor / max(interval, 1))
+                                   * (1 + record['pickup_count'] * PICKUP_GROWTH_FACTOR)
+                                   * FOOD_TYPE_MULTIPLIERS.get(record.get('food', 'NORMAL'), 1))
+                self.pickup_intervals.record(interval)
+                self.points += points
+                self.tuned_points += tuned_points
+            case 'speed_change':
+                self.move_rates[round(record['move_rate'])] += 1
+            case 'death':
+                cause, score = record['cause'], round(record['score'])
+                self.death_causes[cause] += 1
+                self.final_scores.record(score)
+            case 'game_stats':
+                width, buckets = record['input_latency_bucket_width'], record['input_latency_buckets']
+                if width != self.input_latency.bucket_width:
+                    raise ValueError(f'Input latency bucket width {width!r}, '
+                                     f'expected {self.input_latency.bucket_width}')
+                buckets = [round(count) for count in buckets]
+                total, maximum = round(record['input_latency_total']), round(record['input_latency_max'])
+                dropped, coalesced = round(record['dropped_inputs']), round(record.get('coalesced_sounds', 0))
+                self.input_latency.merge(buckets, total, maximum)
+                self.dropped_inputs += dropped
+                self.coalesced_sounds += coalesced
+            case 'audio':
+                self.audio_buffer_latencies[round(record['buffer_latency'], 1)] += 1
+        self.events[event] += 1
+
+    def print(self) -> None:
+        games = self.events['game_start']
+        deaths = self.final_scores.count
+        print(f'records: {sum(self.events.values())} ({self.malformed} malformed)')
+        print(f'games:   {games} started, {deaths} finished')
+        for cause, count in self.death_causes.most_common():
+            print(f'  death by {cause}: {count} ({count / max(deaths, 1):.1%})')
+        print(f'final score:      {self.final_scores}')
+        print(f'pickup interval:  {self.pickup_intervals}')
+        print(f'tick interval:    {self.tick_intervals}')
+        print(f'frame time:       {self.frame_times}')
+        print(f'input latency:    {self.input_latency}')
+        print(f'dropped inputs:   {self.dropped_inputs}')
+        print(f'coalesced sounds: {self.coalesced_sounds}')
+        for buffer_latency, count in sorted(self.audio_buffer_latencies.items()):
+            print(f'  audio buffer period {buffer_latency}ms (configured, not measured): {count} sessions')
+        for move_rate, count in sorted(self.move_rates.items(), reverse=True):
+            print(f'  speed change to {move_rate}ms: {count}')
+
+        pickups = max(self.pickup_intervals.count, 1)
+        print(f'points per pickup: {self.points / pickups:.1f} (SCORE_BASE={SCORE_BASE}, '
+              f'SCORE_EFFICIENCY_FACTOR={SCORE_EFFICIENCY_FACTOR})')
+        print(f'points per pickup: {self.tuned_points / pickups:.1f} (SCORE_BASE={self.score_base}, '
+              f'SCORE_EFFICIENCY_FACTOR={self.efficiency_factor})')
+
+
+def open_log(path: str) -> TextIO:
+    return gzip.open(path, 'rt') if path.endswith('.gz') else open(path, 'r')
+
+
+def read_records(paths: list[str], report: TelemetryReport) -> Iterator[dict]:
+    for path in paths:
+        with open_log(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    report.malformed += 1
+                    continue
+                if isinstance(record, dict):
+                    yield record
+                else:
+                    report.malformed += 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Aggregate gameplay telemetry logs in a single streaming pass.')
+    parser.add_argument('paths', nargs='*', default=[TELEMETRY_PATH + '*'],
+                        help='log files or glob patterns, plain or .gz')
+    parser.add_argument('--score-base', type=float, default=SCORE_BASE,
+                        help='SCORE_BASE to re-score pickups with')
+    parser.add_argument('--efficiency-factor', type=float, default=SCORE_EFFICIENCY_FACTOR,
+                        help='SCORE_EFFICIENCY_FACTOR to re-score pickups with')
+    args = parser.parse_args()
+
+    paths = sorted(path for pattern in args.paths for path in glob.glob(pattern))
+    report = TelemetryReport(args.score_base, args.efficiency_factor)
+    for record in read_records(paths, report):
+        try:
+            report.add(record)
+        except (KeyError, TypeError, ValueError, OverflowError):
+            report.malformed += 1
+    report.print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+from typing import Callable, Optional
+
+from config import TIMER_WHEEL_SLOT_BITS, TIMER_WHEEL_LEVELS
+
+
+class Timer:
+    __slots__ = ('deadline', 'callback', 'interval', 'slot')
+
+    def __init__(self, deadline: int, callback: Callable[[], None], interval: Optional[int]):
+        self.deadline: int = deadline
+        self.callback: Callable[[], None] = callback
+        self.interval: Optional[int] = interval
+        self.slot: Optional[dict['Timer', None]] = None
+
+    def is_active(self) -> bool:
+        return self.slot is not None
+
+
+class TimerWheel:
+    def __init__(self, slot_bits: int = TIMER_WHEEL_SLOT_BITS, levels: int = TIMER_WHEEL_LEVELS):
+        self._slot_bits: int = slot_bits
+        self._slot_mask: int = (1 << slot_bits) - 1
+        self._wheels: list[list[dict[Timer, None]]] = [[{} for _ in range(1 << slot_bits)] for _ in range(levels)]
+        self._occupied: int = 0
+        self._count: int = 0
+        self.now: int = 0
+        self.paused: bool = False
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _insert(self, timer: Timer) -> None:
+        due = max(timer.deadline, self.now)
+        level = 0
+        while (due ^ self.now) >> (self._slot_bits * (level + 1)) and level < len(self._wheels) - 1:
+            level += 1
+
+        index = (due >> (self._slot_bits * level)) & self._slot_mask
+        if level == 0:
+            self._occupied |= 1 << index
+
+        slot = self._wheels[level][index]
+        slot[timer] = None
+        timer.slot = slot
+
+    def schedule(self, delay: int, callback: Callable[[], None], interval: Optional[int] = None) -> Timer:
+        timer = Timer(self.now + max(delay, 1), callback, interval)
+        self._insert(timer)
+        self._count += 1
+        return timer
+
+    def cancel(self, timer: Optional[Timer]) -> None:
+        if timer is None:
+            return
+        timer.interval = None
+        if timer.slot is None:
+            return
+        del timer.slot[timer]
+        timer.slot = None
+        self._count -= 1
+
+    def pause(self) -> None:
+        self.paused = True
+
+    def resume(self) -> None:
+        self.paused = False
+
+    def _cascade(self) -> None:
+        for level in range(1, len(self._wheels)):
+            if (self.now >> (self._slot_bits * level - self._slot_bits)) & self._slot_mask:
+                return
+
+            index = (self.now >> (self._slot_bits * level)) & self._slot_mask
+            timers = self._wheels[level][index]
+            self._wheels[level][index] = {}
+            for timer in list(timers):
+                self._insert(timer)
+
+    def _expire(self) -> None:
+        index = self.now & self._slot_mask
+        timers = self._wheels[0][index]
+        self._wheels[0][index] = {}
+        self._occupied &= ~(1 << index)
+        for timer in list(timers):
+            if timer.slot is not timers:
+                continue
+            if timer.deadline > self.now:
+                self._insert(timer)
+                continue
+
+            timer.slot = None
+            self._count -= 1
+            timer.callback()
+            if timer.interval is not None and timer.slot is None:
+                timer.deadline += max(timer.interval, 1)
+                self._insert(timer)
+                self._count += 1
+
+    def advance(self, delta: int) -> None:
+        target = self.now + delta
+        while self.now < target and not self.paused:
+            if self._count == 0:
+                self.now = target
+                return
+
+            index = self.now & self._slot_mask
+            pending = self._occupied >> (index + 1)
+            step = (pending & -pending).bit_length() if pending else self._slot_mask + 1 - index
+            if self.now + step > target:
+                self.now = target
+                return
+
+            self.now += step
+            if self.now & self._slot_mask == 0:
+                self._cascade()
+            self._expire()
@@ -0,0 +1,197 @@
+import argparse
+import random
+from typing import Callable, Optional
+
+from timer_wheel import Timer, TimerWheel
+
+SLOT_BITS = [1, 2, 3, 6]
+LEVELS = [1, 2, 3, 4]
+DELAYS = [0, 1, 2, 5, 63, 64, 65, 500, 4095, 4096, 100000]
+INTERVALS = [None, None, None, 1, 3, 64, 181, 1000]
+UNLIMITED_INTERVAL = 64
+ADVANCES = [0, 1, 3, 63, 64, 65, 200, 5000, 70000]
+
+
+class NaiveTimers:
+    def __init__(self):
+        self.now: int = 0
+        self.paused: bool = False
+        self._timers: dict[int, list] = {}
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def schedule(self, timer_id: int, delay: int, callback: Callable[[], None], interval: Optional[int]) -> None:
+        self._timers[timer_id] = [self.now + max(delay, 1), interval, callback]
+
+    def cancel(self, timer_id: int) -> None:
+        self._timers.pop(timer_id, None)
+
+    def deadline(self, timer_id: int) -> Optional[int]:
+        timer = self._timers.get(timer_id)
+        return timer[0] if timer is not None else None
+
+    def pause(self) -> None:
+        self.paused = True
+
+    def resume(self) -> None:
+        self.paused = False
+
+    def advance(self, delta: int) -> None:
+        if self.paused:
+            return
+
+        target = self.now + delta
+        while self._timers:
+            due = min(timer[0] for timer in self._timers.values())
+            if due > target:
+                break
+
+            self.now = due
+            for timer_id in sorted(timer_id for timer_id, timer in self._timers.items() if timer[0] == due):
+                timer = self._timers.get(timer_id)
+                if timer is None or timer[0] != due:
+                    continue
+                if timer[1] is None:
+                    del self._timers[timer_id]
+                timer[2]()
+                if timer[1] is not None and timer_id in self._timers:
+                    timer[0] += max(timer[1], 1)
+        self.now = target
+
+
+class WheelTimers:
+    def __init__(self, slot_bits: int, levels: int):
+        self.wheel: TimerWheel = TimerWheel(slot_bits, levels)
+        self._timers: dict[int, Timer] = {}
+
+    def __len__(self) -> int:
+        return len(self.wheel)
+
+    @property
+    def now(self) -> int:
+        return self.wheel.now
+
+    def schedule(self, timer_id: int, delay: int, callback: Callable[[], None], interval: Optional[int]) -> None:
+        self._timers[timer_id] = self.wheel.schedule(delay, callback, interval)
+
+    def cancel(self, timer_id: int) -> None:
+        self.wheel.cancel(self._timers[timer_id])
+
+    def deadline(self, timer_id: int) -> Optional[int]:
+        timer = self._timers[timer_id]
+        return timer.deadline if timer.is_active() else None
+
+    def pause(self) -> None:
+        self.wheel.pause()
+
+    def resume(self) -> None:
+        self.wheel.resume()
+
+    def advance(self, delta: int) -> None:
+        self.wheel.advance(delta)
+
+
+class Recorder:
+    def __init__(self, timers, victims: dict[int, Optional[int]], fire_limits: dict[int, Optional[int]]):
+        self.timers = timers
+        self.victims: dict[int, Optional[int]] = victims
+        self.fire_limits: dict[int, Optional[int]] = fire_limits
+        self.fired: list[tuple[int, int]] = []
+        self.fire_counts: dict[int, int] = {}
+        self.last_fired: dict[int, int] = {}
+
+    def callback(self, timer_id: int) -> Callable[[], None]:
+        return lambda: self.fire(timer_id)
+
+    def fire(self, timer_id: int) -> None:
+        now = self.timers.now
+        self.fired.append((now, timer_id))
+        self.last_fired[timer_id] = now
+        self.fire_counts[timer_id] = self.fire_counts.get(timer_id, 0) + 1
+        if self.fire_counts[timer_id] == self.fire_limits[timer_id]:
+            self.timers.cancel(timer_id)
+
+        # Only cancel victims that are not due this tick, the order of timers expiring on the same tick is unspecified
+        victim = self.victims[timer_id]
+        if victim is not None and self.last_fired.get(victim) != now:
+            deadline = self.timers.deadline(victim)
+            if deadline is not None and deadline > now:
+                self.timers.cancel(victim)
+
+    def take_fired(self) -> list[tuple[int, int]]:
+        fired = sorted(self.fired)
+        self.fired.clear()
+        return fired
+
+
+def run_seed(seed: int, operations: int) -> tuple[Optional[str], int]:
+    rng = random.Random(seed)
+    slot_bits, levels = rng.choice(SLOT_BITS), rng.choice(LEVELS)
+    victims = {}
+    fire_limits = {}
+    wheel = Recorder(WheelTimers(slot_bits, levels), victims, fire_limits)
+    naive = Recorder(NaiveTimers(), victims, fire_limits)
+    timer_ids = []
+    fires = 0
+    for index in range(operations):
+        roll = rng.random()
+        if roll < 0.35:
+            timer_id = len(timer_ids)
+            delay, interval = rng.choice(DELAYS), rng.choice(INTERVALS)
+            victims[timer_id] = rng.choice(timer_ids) if timer_ids and rng.random() < 0.2 else None
+            limited = interval is not None and (interval < UNLIMITED_INTERVAL or rng.random() < 0.3)
+            fire_limits[timer_id] = rng.randint(1, 20) if limited else None
+            timer_ids.append(timer_id)
+            operation = f'schedule({timer_id}, delay={delay}, interval={interval})'
+            for recorder in (wheel, naive):
+                recorder.timers.schedule(timer_id, delay, recorder.callback(timer_id), interval)
+        elif roll < 0.45 and timer_ids:
+            timer_id = rng.choice(timer_ids)
+            operation = f'cancel({timer_id})'
+            for recorder in (wheel, naive):
+                recorder.timers.cancel(timer_id)
+        elif roll < 0.5:
+            operation = rng.choice(['pause', 'resume'])
+            for recorder in (wheel, naive):
+                getattr(recorder.timers, operation)()
+        else:
+            delta = rng.choice(ADVANCES)
+            operation = f'advance({delta})'
+            for recorder in (wheel, naive):
+                recorder.timers.advance(delta)
+
+        wheel_fired, naive_fired = wheel.take_fired(), naive.take_fired()
+        fires += len(naive_fired)
+        state = (wheel.timers.now, len(wheel.timers), wheel_fired)
+        expected = (naive.timers.now, len(naive.timers), naive_fired)
+        if state != expected:
+            return (f'seed {seed} (slot_bits={slot_bits}, levels={levels}) operation {index} {operation}: '
+                    f'expected now={expected[0]} pending={expected[1]} fired={expected[2]}, '
+                    f'got now={state[0]} pending={state[1]} fired={state[2]}'), fires
+    return None, fires
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Replay random schedule/cancel/advance sequences against the timer '
+                                                 'wheel and a naive model, and report the first divergence per seed.')
+    parser.add_argument('--seeds', type=int, default=100)
+    parser.add_argument('--operations', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=0, help='first seed')
+    args = parser.parse_args()
+
+    failures = 0
+    fires = 0
+    for seed in range(args.seed, args.seed + args.seeds):
+        failure, seed_fires = run_seed(seed, args.operations)
+        fires += seed_fires
+        if failure is not None:
+            failures += 1
+            print(failure)
+    print(f'{args.seeds} seeds, {args.seeds * args.operations} operations, {fires} timers fired, {failures} diverged')
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
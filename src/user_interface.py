@@ -5,7 +5,7 @@ from typing import Optional
 import pygame
 import pygame_gui.elements
 
-from config import WIDTH, HEIGHT, PLAYING_UI_WIDTH, PLAYING_UI_HEIGHT
+from config import WIDTH, HEIGHT, PLAYING_UI_WIDTH, PLAYING_UI_HEIGHT, HUD_SCORE_DIGITS
 from highscore_manager import HighscoreManager
 
 
@@ -288,24 +288,64 @@ class MainMenuUI(UserInterface):
                 create_label(str(score), (280, (i + 1) * 30), (210, 30), object_id=o_id)
 
 
+class PlayingHUD:
+    def __init__(self, manager: pygame_gui.UIManager, rect: pygame.Rect):
+        theme = manager.get_theme()
+        self._font = theme.get_font(['@playing_label', 'label'])
+        self._colour: pygame.Color = theme.get_colour('normal_text', ['@playing_label', 'label'])
+        self._rect: pygame.Rect = rect
+        self._surface: pygame.Surface = pygame.Surface(rect.size, flags=pygame.SRCALPHA)
+
+        self._glyphs: dict[str, pygame.Surface] = {char: self._render(char) for char in '0123456789-'}
+        self._digit_width: int = max(glyph.get_width() for glyph in self._glyphs.values())
+        self._score_text: pygame.Surface = self._render('SCORE: ')
+
+        score_width = self._score_text.get_width() + HUD_SCORE_DIGITS * self._digit_width
+        self._score_x: int = (rect.width - score_width) // 2
+        self._digits_x: int = self._score_x + self._score_text.get_width()
+        self._name_rect: pygame.Rect = pygame.Rect(10, 0, self._score_x - 10, rect.height)
+        self._digits: str = ''
+
+        self._blit(self._score_text, self._score_x)
+
+    def _render(self, text: str) -> pygame.Surface:
+        return self._font.render_premul(text, self._colour)
+
+    def _blit(self, glyph: pygame.Surface, x: int) -> None:
+        self._surface.blit(glyph, (x, (self._rect.height - glyph.get_height()) // 2),
+                           special_flags=pygame.BLEND_PREMULTIPLIED)
+
+    def set_name(self, player_name: str) -> None:
+        self._surface.fill((0, 0, 0, 0), self._name_rect)
+        name_text = self._render('NAME: ' + player_name)
+        self._surface.set_clip(self._name_rect)
+        self._blit(name_text, self._name_rect.x)
+        self._surface.set_clip(None)
+
+    def set_score(self, score: str) -> None:
+        digits = score if len(score) <= HUD_SCORE_DIGITS else '9' * HUD_SCORE_DIGITS
+        for i in range(max(len(digits), len(self._digits))):
+            char = digits[i] if i < len(digits) else ''
+            if i < len(self._digits) and self._digits[i] == char:
+                continue
+
+            x = self._digits_x + i * self._digit_width
+            self._surface.fill((0, 0, 0, 0), pygame.Rect(x, 0, self._digit_width, self._rect.height))
+            if char != '':
+                glyph = self._glyphs[char]
+                self._blit(glyph, x + (self._digit_width - glyph.get_width()) // 2)
+        self._digits = digits
+
+    def draw(self, screen: pygame.Surface) -> None:
+        screen.blit(self._surface, self._rect, special_flags=pygame.BLEND_PREMULTIPLIED)
+
+
 class PlayingUI(UserInterface):
     def __init__(self, manager: pygame_gui.UIManager):
-        super().__init__(manager, relative_container_rect=pygame.Rect(0, 0, PLAYING_UI_WIDTH, PLAYING_UI_HEIGHT))
-        self.name_label = pygame_gui.elements.UILabel(relative_rect=pygame.Rect(5, 0, 100, PLAYING_UI_HEIGHT - 20),
-                                                      manager=manager,
-                                                      container=self._container,
-                                                      text='',
-                                                      anchors={'centery': 'centery'},
-                                                      object_id=pygame_gui.core.ObjectID(object_id='#name_label',
-                                                                                         class_id='@playing_label'))
-
-        self.score_label = pygame_gui.elements.UILabel(relative_rect=pygame.Rect(0, 0, 100, PLAYING_UI_HEIGHT - 20),
-                                                       manager=manager,
-                                                       container=self._container,
-                                                       text='SCORE: 0',
-                                                       anchors={'center': 'center'},
-                                                       object_id=pygame_gui.core.ObjectID(object_id=None,
-                                                                                          class_id='@playing_label'))
+        container_rect = pygame.Rect(0, 0, PLAYING_UI_WIDTH, PLAYING_UI_HEIGHT)
+        super().__init__(manager, relative_container_rect=container_rect)
+        self.hud = PlayingHUD(manager, container_rect)
+        self.hud.set_score('0')
 
         button_rect = pygame.Rect(0, 0, 100, PLAYING_UI_HEIGHT - 20)
         button_rect.right = -5
@@ -329,15 +369,17 @@ class PlayingUI(UserInterface):
     def _receive_data(self, data: dict[str, str]):
         player_name = data.get('player_name', None)
         score = data.get('score', None)
-        font = self._manager.get_theme().get_font(['@playing_label'])
 
         if player_name is not None:
-            self.name_label.set_dimensions((font.size('NAME: ' + player_name)[0] + 10, PLAYING_UI_HEIGHT - 20))
-            self.name_label.set_text('NAME: ' + player_name)
+            self.hud.set_name(player_name)
 
         if score is not None:
-            self.score_label.set_dimensions((font.size('SCORE: ' + score)[0] + 10, PLAYING_UI_HEIGHT - 20))
-            self.score_label.set_text('SCORE: ' + score)
+            self.hud.set_score(score)
+
+    def draw(self, screen: pygame.Surface) -> None:
+        super().draw(screen)
+        if not self.is_hidden():
+            self.hud.draw(screen)
 
 
 class PauseUI(UserInterface):